@@ -1,9 +1,9 @@
 import streamlit as st
-import geopandas as gpd
-import plotly.express as px
 import plotly.graph_objects as go
-import numpy as np
-from shapely.geometry import Point
+
+from geodata import load_layer
+from map_aggregation import grid_map, scatter_points
+from suitability import DEFAULT_WEIGHTS, FEATURE_LABELS, score_grid
 
 # Configure Streamlit page layout
 st.set_page_config(layout="wide")
@@ -18,16 +18,19 @@ locations for fast and slow chargers based on factors such as population density
 and road networks. Use the interactive maps below to explore each strategy.
 """)
 
-# Load Data (replace paths with your actual data file paths)
-power_grid = gpd.read_file("C:/Users/Zakhele/Downloads/Compressed/pickled_dfs/Coordinates/power_grid.geojson")
-roads = gpd.read_file("C:/Users/Zakhele/Downloads/Compressed/pickled_dfs/Coordinates/roads.geojson")
-buildings = gpd.read_file("C:/Users/Zakhele/Downloads/Compressed/pickled_dfs/Coordinates/buildings.geojson")
-current_charging_stations = gpd.read_file("C:/Users/Zakhele/Downloads/Compressed/pickled_dfs/Coordinates/current_charging_stations.geojson")
-suggested_fast_chargers = gpd.read_file("C:/Users/Zakhele/Downloads/Compressed/pickled_dfs/Coordinates/fast_charger.shp")
-suggested_slow_chargers = gpd.read_file("C:/Users/Zakhele/Downloads/Compressed/pickled_dfs/Coordinates/slow_charger.shp")
+# Load Data (parsed once per process and cached next to the sources, see geodata.py)
+power_grid = load_layer("power_grid")
+roads = load_layer("roads")
+buildings = load_layer("buildings")
+current_charging_stations = load_layer("current_charging_stations")
+suggested_fast_chargers = load_layer("fast_chargers")
+suggested_slow_chargers = load_layer("slow_chargers")
 
-# Adding a dummy score column for demonstration (use actual score column when available)
-suggested_fast_chargers['dummy_score'] = np.random.randint(1, 100, size=len(suggested_fast_chargers))
+# Suitability weights; features are computed once per cell size, so a weight change only re-scores
+st.sidebar.header("Suitability Weights")
+weights = {name: st.sidebar.slider(label, min_value=-1.0, max_value=1.0, value=DEFAULT_WEIGHTS[name], step=0.05)
+           for name, label in FEATURE_LABELS.items()}
+cell_km = st.sidebar.select_slider("Grid cell size (km)", options=[5, 10, 20, 50], value=10)
 
 # Section: Grid-Based Analysis
 st.header("1. Grid-Based Analysis")
@@ -37,13 +40,14 @@ population density, proximity to roads, and grid power availability. Higher scor
 for EV chargers.
 """)
 
-fig_grid = px.choropleth_mapbox(
-    suggested_fast_chargers,
-    geojson=suggested_fast_chargers.geometry,
-    color="dummy_score",  # Use actual suitability score column when available
-    title="Grid-Based Analysis: Charger Suitability Scores",
-    mapbox_style="open-street-map",
+grid, grid_scores = score_grid(weights, cell_km)
+# Drawn as an image with one block per cell, so every cell of the chosen size stays visible
+fig_grid = grid_map(
+    grid.lon, grid.lat, grid_scores,
     zoom=5,
+    labels={"color": "suitability_score"},
+    title=f"Grid-Based Analysis: Charger Suitability of {cell_km} km Cells",
+    mapbox_style="open-street-map",
     center={"lat": -30, "lon": 25},
     opacity=0.5
 )
@@ -62,8 +66,8 @@ fig_geo = go.Figure()
 
 # Add Road Network
 fig_geo.add_trace(go.Scattermapbox(
-    lat=roads.geometry.y,
-    lon=roads.geometry.x,
+    lat=roads.lat,
+    lon=roads.lon,
     mode="lines",
     line=dict(width=1, color="blue"),
     name="Road Network"
@@ -71,8 +75,8 @@ fig_geo.add_trace(go.Scattermapbox(
 
 # Add Power Grid
 fig_geo.add_trace(go.Scattermapbox(
-    lat=power_grid.geometry.y,
-    lon=power_grid.geometry.x,
+    lat=power_grid.lat,
+    lon=power_grid.lon,
     mode="lines",
     line=dict(width=1, color="orange"),
     name="Power Grid"
@@ -80,8 +84,8 @@ fig_geo.add_trace(go.Scattermapbox(
 
 # Add Population Density (if applicable) and Buildings as Points
 fig_geo.add_trace(go.Scattermapbox(
-    lat=buildings.geometry.y,
-    lon=buildings.geometry.x,
+    lat=buildings.lat,
+    lon=buildings.lon,
     mode="markers",
     marker=go.scattermapbox.Marker(size=5, color="green"),
     name="Building Density"
@@ -104,14 +108,13 @@ are suited for slow chargers.
 """)
 
 # Replace this with actual cluster data if available
-fig_kmeans = px.scatter_mapbox(
+fig_kmeans = scatter_points(
     buildings,  # Replace with actual dataset containing cluster information
-    lat=buildings.geometry.y,
-    lon=buildings.geometry.x,
-    color="cluster_label",  # Use the correct cluster label column
+    zoom=5,
+    color=buildings.attributes.get("cluster_label"),  # Use the correct cluster label column
+    labels={"color": "cluster_label"},
     title="K-means Clustering: Charger Type Suitability",
     mapbox_style="open-street-map",
-    zoom=5,
     center={"lat": -30, "lon": 25}
 )
 st.plotly_chart(fig_kmeans, use_container_width=True)
@@ -127,8 +130,8 @@ fig_recommend = go.Figure()
 
 # Suggested Slow Chargers
 fig_recommend.add_trace(go.Scattermapbox(
-    lat=suggested_slow_chargers.geometry.y,
-    lon=suggested_slow_chargers.geometry.x,
+    lat=suggested_slow_chargers.lat,
+    lon=suggested_slow_chargers.lon,
     mode="markers",
     marker=go.scattermapbox.Marker(size=10, color="blue"),
     name="Suggested Slow Chargers"
@@ -136,8 +139,8 @@ fig_recommend.add_trace(go.Scattermapbox(
 
 # Suggested Fast Chargers
 fig_recommend.add_trace(go.Scattermapbox(
-    lat=suggested_fast_chargers.geometry.y,
-    lon=suggested_fast_chargers.geometry.x,
+    lat=suggested_fast_chargers.lat,
+    lon=suggested_fast_chargers.lon,
     mode="markers",
     marker=go.scattermapbox.Marker(size=10, color="red"),
     name="Suggested Fast Chargers"
@@ -1,39 +1,40 @@
 import streamlit as st
-import geopandas as gpd
-import plotly.express as px
 import plotly.graph_objects as go
 import numpy as np
 
+from geodata import load_layer
+from map_aggregation import scatter_points
+
 # Configure Streamlit page layout
 st.set_page_config(layout="wide")
 
+# Data overview for all maps: (map title, geodata layer)
+ALL_MAPS = [
+    ("Buildings", "buildings"),
+    ("Population Density", "population_density"),
+    ("Road Network", "roads"),
+    ("Electricity Grid", "power_grid"),
+    ("Current Charging Stations", "current_charging_stations"),
+    ("Suggested Fast Chargers", "fast_chargers"),
+    ("Suggested Slow Chargers", "slow_chargers")
+]
+
+# The maps each page draws; only the selected page's layers are loaded
+PAGE_LAYERS = {
+    "Grid-Based Analysis": ALL_MAPS,
+    "Geospatial Analysis": ALL_MAPS,
+    "K-means Clustering": ALL_MAPS,
+    "Conclusion": [],
+}
+
 # Sidebar Navigation for Page Selection
 st.title("EV Charging Station Placement Analysis in South Africa")
-page = st.sidebar.selectbox("Choose Analysis Strategy", ["Grid-Based Analysis", "Geospatial Analysis", "K-means Clustering", "Conclusion"])
-
-# Load Data (replace paths with your actual data file paths)
-power_grid = gpd.read_file("C:/Users/Zakhele/Downloads/Compressed/pickled_dfs/Coordinates/power_grid.geojson")
-roads = gpd.read_file("C:/Users/Zakhele/Downloads/Compressed/pickled_dfs/Coordinates/roads.geojson")
-buildings = gpd.read_file("C:/Users/Zakhele/Downloads/Compressed/pickled_dfs/Coordinates/buildings.geojson")
-population_density = gpd.read_file("C:/Users/Zakhele/Downloads/Compressed/pickled_dfs/Coordinates/med_density.geojson")  # Use appropriate population file
-current_charging_stations = gpd.read_file("C:/Users/Zakhele/Downloads/Compressed/pickled_dfs/Coordinates/current_charging_stations.geojson")
-suggested_fast_chargers = gpd.read_file("C:/Users/Zakhele/Downloads/Compressed/pickled_dfs/Coordinates/fast_charger.shp")
-suggested_slow_chargers = gpd.read_file("C:/Users/Zakhele/Downloads/Compressed/pickled_dfs/Coordinates/slow_charger.shp")
-
-# Add dummy columns for testing (replace with actual data columns if available)
-suggested_fast_chargers['dummy_score'] = np.random.randint(1, 100, size=len(suggested_fast_chargers))
-buildings['dummy_cluster'] = np.random.choice(['Cluster 1', 'Cluster 2', 'Cluster 3'], size=len(buildings))
-
-# Data overview for all maps
-datasets = [
-    ("Buildings", buildings),
-    ("Population Density", population_density),
-    ("Road Network", roads),
-    ("Electricity Grid", power_grid),
-    ("Current Charging Stations", current_charging_stations),
-    ("Suggested Fast Chargers", suggested_fast_chargers),
-    ("Suggested Slow Chargers", suggested_slow_chargers)
-]
+page = st.sidebar.selectbox("Choose Analysis Strategy", list(PAGE_LAYERS))
+# Large layers are binned into weighted markers sized for this zoom level
+map_zoom = st.sidebar.slider("Map zoom", min_value=3, max_value=12, value=5)
+
+# Load Data (parsed once per process and cached next to the sources, see geodata.py)
+datasets = [(name, load_layer(layer)) for name, layer in PAGE_LAYERS[page]]
 
 # Page 1: Grid-Based Analysis
 if page == "Grid-Based Analysis":
@@ -45,14 +46,17 @@ if page == "Grid-Based Analysis":
     Each cell's score indicates its suitability for charging stations.
     """)
 
+    # Add dummy columns for testing (replace with actual data columns if available)
+    dummy_score = {"Suggested Fast Chargers": np.random.randint(1, 100, size=len(dict(datasets)["Suggested Fast Chargers"]))}
+
     # Display maps for each dataset with grid-based context
     for name, data in datasets:
         st.subheader(f"{name} Map")
-        fig = px.scatter_mapbox(
-            data, lat=data.geometry.y, lon=data.geometry.x,
-            color="dummy_score" if name in ["Suggested Fast Chargers", "Suggested Slow Chargers"] else None,
+        fig = scatter_points(
+            data, map_zoom,
+            color=dummy_score.get(name), labels={"color": "dummy_score"},
             title=f"{name} - Grid-Based Analysis",
-            mapbox_style="open-street-map", zoom=5, center={"lat": -30, "lon": 25}
+            mapbox_style="open-street-map", center={"lat": -30, "lon": 25}
         )
         st.plotly_chart(fig, use_container_width=True)
 
@@ -68,14 +72,16 @@ elif page == "Geospatial Analysis":
     This layered approach reveals patterns and connections that support effective decision-making.
     """)
 
+    dummy_cluster = {"Buildings": np.random.choice(['Cluster 1', 'Cluster 2', 'Cluster 3'], size=len(dict(datasets)["Buildings"]))}
+
     # Display maps for each dataset with geospatial context
     for name, data in datasets:
         st.subheader(f"{name} Map")
-        fig = px.scatter_mapbox(
-            data, lat=data.geometry.y, lon=data.geometry.x,
-            color="dummy_cluster" if name == "Buildings" else None,
+        fig = scatter_points(
+            data, map_zoom,
+            color=dummy_cluster.get(name), labels={"color": "dummy_cluster"},
             title=f"{name} - Geospatial Analysis",
-            mapbox_style="open-street-map", zoom=5, center={"lat": -30, "lon": 25}
+            mapbox_style="open-street-map", center={"lat": -30, "lon": 25}
         )
         st.plotly_chart(fig, use_container_width=True)
 
@@ -90,14 +96,16 @@ elif page == "K-means Clustering":
     - **Slow Chargers**: Prioritized in residential and suburban clusters.
     """)
     
+    dummy_cluster = {"Buildings": np.random.choice(['Cluster 1', 'Cluster 2', 'Cluster 3'], size=len(dict(datasets)["Buildings"]))}
+
     # Display maps for each dataset with clustering context
     for name, data in datasets:
         st.subheader(f"{name} Map")
-        fig = px.scatter_mapbox(
-            data, lat=data.geometry.y, lon=data.geometry.x,
-            color="dummy_cluster" if name == "Buildings" else None,
+        fig = scatter_points(
+            data, map_zoom,
+            color=dummy_cluster.get(name), labels={"color": "dummy_cluster"},
             title=f"{name} - K-means Clustering",
-            mapbox_style="open-street-map", zoom=5, center={"lat": -30, "lon": 25}
+            mapbox_style="open-street-map", center={"lat": -30, "lon": 25}
         )
         st.plotly_chart(fig, use_container_width=True)
 
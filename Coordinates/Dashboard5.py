@@ -1,28 +1,31 @@
 import streamlit as st
-import geopandas as gpd
-import plotly.express as px
 import numpy as np
 
+from geodata import load_layer
+from map_aggregation import grid_map, scatter_points
+from spatial_index import get_spatial_index, grid_points, nearest_of
+from suitability import DEFAULT_WEIGHTS, FEATURE_LABELS, SOURCE_LAYERS, score_grid, score_points
+
 # Configure Streamlit page layout
 st.set_page_config(layout="wide")
 
+# The geodata layers each page draws; only the selected page's layers are loaded
+PAGE_LAYERS = {
+    "Grid-Based Analysis": ["slow_chargers", "fast_chargers", *SOURCE_LAYERS],
+    "Geospatial Analysis": ["ev_charging_stations"],
+    "K-means Clustering": ["kmeans_clusters", "current_charging_stations"],
+    "Coverage Gaps": ["current_charging_stations", "fast_chargers", "slow_chargers", "buildings"],
+    "Conclusion": [],
+}
+
 # Sidebar Navigation for Page Selection
 st.title("EV Charging Station Placement Analysis in South Africa")
-page = st.sidebar.selectbox("Choose Analysis Strategy", ["Grid-Based Analysis", "Geospatial Analysis", "K-means Clustering", "Conclusion"])
-
-# Load Data (using relative paths based on the folder structure)
-# Replace the local paths with paths in your GitHub repo for online deployment
-geospatial_data = gpd.read_file("Coordinates/ev_charging_stations.geojson")
-kmeans_clusters = gpd.read_file("Coordinates/combined_clusters.geojson")
-current_charging_stations = gpd.read_file("Coordinates/current_charging_stations.geojson")
-current_charging_stations_cluster = gpd.read_file("Coordinates/current_charging_stations_cluster.geojson")
-grid_slow_chargers = gpd.read_file("Coordinates/slow_charger.geojson")
-grid_fast_chargers = gpd.read_file("Coordinates/fast_charger.geojson")
-
-# Add dummy columns for visualization
-kmeans_clusters['dummy_cluster'] = np.random.choice(['Cluster 1', 'Cluster 2', 'Cluster 3'], size=len(kmeans_clusters))
-grid_slow_chargers['suitability_score'] = np.random.randint(1, 100, size=len(grid_slow_chargers))
-grid_fast_chargers['suitability_score'] = np.random.randint(1, 100, size=len(grid_fast_chargers))
+page = st.sidebar.selectbox("Choose Analysis Strategy", list(PAGE_LAYERS))
+# Large layers are binned into weighted markers sized for this zoom level
+map_zoom = st.sidebar.slider("Map zoom", min_value=3, max_value=12, value=5)
+
+# Load Data (parsed once per process and cached next to the sources, see geodata.py)
+layers = {name: load_layer(name) for name in PAGE_LAYERS[page]}
 
 # Page 1: Grid-Based Analysis
 if page == "Grid-Based Analysis":
@@ -34,24 +37,46 @@ if page == "Grid-Based Analysis":
     Each cell's score indicates its suitability for charging stations.
     """)
 
+    # Suitability weights; features are computed once per cell size, so a weight change only re-scores
+    st.sidebar.header("Suitability Weights")
+    weights = {name: st.sidebar.slider(label, min_value=-1.0, max_value=1.0, value=DEFAULT_WEIGHTS[name], step=0.05)
+               for name, label in FEATURE_LABELS.items()}
+    cell_km = st.sidebar.select_slider("Grid cell size (km)", options=[5, 10, 20, 50], value=10)
+
+    grid, grid_scores = score_grid(weights, cell_km)
+    grid_slow_chargers, grid_fast_chargers = layers["slow_chargers"], layers["fast_chargers"]
+    slow_suitability_score = score_points(grid_slow_chargers, weights)
+    fast_suitability_score = score_points(grid_fast_chargers, weights)
+
+    # Visualizing the scored grid cells
+    st.subheader("Suitability Scores (Grid-Based)")
+    fig_cells = grid_map(
+        grid.lon, grid.lat, grid_scores, map_zoom,
+        labels={"color": "suitability_score"},
+        title=f"Charger Suitability of {cell_km} km Grid Cells",
+        mapbox_style="open-street-map", center={"lat": -30, "lon": 25},
+        opacity=0.6
+    )
+    st.plotly_chart(fig_cells, use_container_width=True)
+
     # Visualizing slow chargers based on suitability
     st.subheader("Suggested Slow Chargers (Grid-Based)")
-    fig_slow = px.scatter_mapbox(
-        grid_slow_chargers, lat=grid_slow_chargers.geometry.y, lon=grid_slow_chargers.geometry.x,
-        color="suitability_score",
+    fig_slow = scatter_points(
+        grid_slow_chargers, map_zoom,
+        color=slow_suitability_score, labels={"color": "suitability_score"},
         title="Suggested Slow Chargers - Grid-Based Analysis",
-        mapbox_style="open-street-map", zoom=5, center={"lat": -30, "lon": 25},
+        mapbox_style="open-street-map", center={"lat": -30, "lon": 25},
         opacity=0.6
     )
     st.plotly_chart(fig_slow, use_container_width=True)
 
     # Visualizing fast chargers based on suitability
     st.subheader("Suggested Fast Chargers (Grid-Based)")
-    fig_fast = px.scatter_mapbox(
-        grid_fast_chargers, lat=grid_fast_chargers.geometry.y, lon=grid_fast_chargers.geometry.x,
-        color="suitability_score",
+    fig_fast = scatter_points(
+        grid_fast_chargers, map_zoom,
+        color=fast_suitability_score, labels={"color": "suitability_score"},
         title="Suggested Fast Chargers - Grid-Based Analysis",
-        mapbox_style="open-street-map", zoom=5, center={"lat": -30, "lon": 25},
+        mapbox_style="open-street-map", center={"lat": -30, "lon": 25},
         opacity=0.6
     )
     st.plotly_chart(fig_fast, use_container_width=True)
@@ -69,11 +94,12 @@ elif page == "Geospatial Analysis":
     """)
 
     # Display map for Geospatial data
+    geospatial_data = layers["ev_charging_stations"]
     st.subheader("Existing EV Charging Stations (Geospatial)")
-    fig_geospatial = px.scatter_mapbox(
-        geospatial_data, lat=geospatial_data.geometry.y, lon=geospatial_data.geometry.x,
+    fig_geospatial = scatter_points(
+        geospatial_data, map_zoom,
         title="Existing EV Charging Stations - Geospatial Analysis",
-        mapbox_style="open-street-map", zoom=5, center={"lat": -30, "lon": 25},
+        mapbox_style="open-street-map", center={"lat": -30, "lon": 25},
         opacity=0.6
     )
     st.plotly_chart(fig_geospatial, use_container_width=True)
@@ -89,28 +115,83 @@ elif page == "K-means Clustering":
     - **Slow Chargers**: Prioritized in residential and suburban clusters.
     """)
 
+    kmeans_clusters, current_charging_stations = layers["kmeans_clusters"], layers["current_charging_stations"]
+    dummy_cluster = np.random.choice(['Cluster 1', 'Cluster 2', 'Cluster 3'], size=len(kmeans_clusters))
+
     # Display map for K-means clusters
     st.subheader("K-means Clustered Charger Placement")
-    fig_kmeans = px.scatter_mapbox(
-        kmeans_clusters, lat=kmeans_clusters.geometry.y, lon=kmeans_clusters.geometry.x,
-        color="dummy_cluster",
+    fig_kmeans = scatter_points(
+        kmeans_clusters, map_zoom,
+        color=dummy_cluster, labels={"color": "dummy_cluster"},
         title="K-means Clustered Charger Placement",
-        mapbox_style="open-street-map", zoom=5, center={"lat": -30, "lon": 25},
+        mapbox_style="open-street-map", center={"lat": -30, "lon": 25},
         opacity=0.6
     )
     st.plotly_chart(fig_kmeans, use_container_width=True)
 
     # Display current charging stations and clustered charging stations
     st.subheader("Current Charging Stations")
-    fig_current = px.scatter_mapbox(
-        current_charging_stations, lat=current_charging_stations.geometry.y, lon=current_charging_stations.geometry.x,
+    fig_current = scatter_points(
+        current_charging_stations, map_zoom,
         title="Current Charging Stations",
-        mapbox_style="open-street-map", zoom=5, center={"lat": -30, "lon": 25},
+        mapbox_style="open-street-map", center={"lat": -30, "lon": 25},
         opacity=0.6
     )
     st.plotly_chart(fig_current, use_container_width=True)
 
-# Page 4: Conclusion
+# Page 4: Coverage Gaps
+elif page == "Coverage Gaps":
+    st.header("Coverage Gap Analysis")
+    st.write("""
+    A grid is laid over South Africa and every cell is measured by its great-circle distance to the nearest charger.
+    Cells farther away than the coverage radius are gaps in the network and candidates for new stations.
+    """)
+
+    charger_layers = {
+        "Current Charging Stations": "current_charging_stations",
+        "Suggested Fast Chargers": "fast_chargers",
+        "Suggested Slow Chargers": "slow_chargers",
+    }
+    selected = st.multiselect("Chargers", list(charger_layers), default=list(charger_layers))
+    radius_km = st.slider("Coverage radius (km)", min_value=5, max_value=100, value=20, step=5)
+    cell_km = st.select_slider("Grid cell size (km)", options=[5, 10, 20, 50], value=10)
+    if not selected:
+        st.info("Select at least one charger layer.")
+        st.stop()
+
+    # One k-d tree per charger layer, built on first use and shared by every session
+    indexes = [get_spatial_index(layers[charger_layers[name]]) for name in selected]
+    cell_lon, cell_lat = grid_points(cell_km=cell_km)
+    cell_distance = nearest_of(indexes, cell_lon, cell_lat)
+    uncovered = cell_distance > radius_km
+
+    col1, col2 = st.columns(2)
+    col1.metric(f"Grid cells beyond {radius_km} km of a charger", f"{uncovered.mean():.0%}")
+    col2.metric("Farthest cell from a charger", f"{cell_distance.max():.0f} km")
+
+    st.subheader("Uncovered Grid Cells")
+    # Covered cells are left transparent
+    fig_gaps = grid_map(
+        cell_lon, cell_lat, np.where(uncovered, cell_distance, np.nan), map_zoom,
+        labels={"color": "km to nearest charger"},
+        title=f"Grid Cells More Than {radius_km} km From a Charger",
+        mapbox_style="open-street-map", center={"lat": -30, "lon": 25},
+        opacity=0.6
+    )
+    st.plotly_chart(fig_gaps, use_container_width=True)
+
+    # Distance from every building to its nearest charger
+    st.subheader("Buildings and Their Nearest Charger")
+    buildings = layers["buildings"]
+    building_distance = nearest_of(indexes, buildings)
+    st.dataframe({
+        "longitude": buildings.lon,
+        "latitude": buildings.lat,
+        "nearest charger (km)": building_distance.round(1),
+        f"within {radius_km} km": building_distance <= radius_km,
+    }, use_container_width=True)
+
+# Page 5: Conclusion
 elif page == "Conclusion":
     st.header("Conclusion and Recommendations")
     st.image("Assorted Pictures/Scenic EV charging or clean energy concept..jpeg", caption="A Sustainable Future with Optimized EV Charging Infrastructure")
@@ -0,0 +1,186 @@
+"""Shared, cached access to the EV dashboards' geodata layers.
+
+    from geodata import load_layer
+
+    stations = load_layer("current_charging_stations")
+    px.scatter_mapbox(lat=stations.lat, lon=stations.lon)
+
+Streamlit reruns a dashboard script on every widget interaction, and parsing
+GeoJSON and shapefiles with geopandas costs far more than plotting them.
+Each layer is therefore parsed once, written to `.geocache/` as a plain
+NumPy .npz file of lon/lat float64 arrays plus its attribute columns, and
+kept in memory for the life of the process. Both copies are rebuilt when the
+source file's modification time changes; geopandas is only imported then.
+Run
+
+    python Coordinates/geodata.py build
+
+at deploy time so that no worker has to parse a source file at all.
+"""
+import argparse
+import os
+import threading
+
+import numpy as np
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(DATA_DIR, ".geocache")
+
+# Layer name -> source file in DATA_DIR
+LAYERS = {
+    "power_grid": "power_grid.geojson",
+    "roads": "roads.geojson",
+    "buildings": "buildings.geojson",
+    "population_density": "med_density.geojson",
+    "low_density": "low_density.geojson",
+    "high_density": "high_density.geojson",
+    "current_charging_stations": "current_charging_stations.geojson",
+    "current_charging_stations_cluster": "current_charging_stations_cluster.geojson",
+    "ev_charging_stations": "ev_charging_stations.geojson",
+    "kmeans_clusters": "combined_clusters.geojson",
+    "fast_chargers": "fast_charger.shp",
+    "slow_chargers": "slow_charger.shp",
+}
+
+# The suggested charger shapefiles store (lat, lon). Several GeoJSON files declare WGS84
+# but hold Web Mercator metres, in every row (density layers) or only some (kmeans_clusters);
+# read_source detects those rows by their out-of-range degrees
+SWAPPED_AXES = {"fast_chargers", "slow_chargers"}
+
+# Web Mercator (EPSG:3857) sphere radius, in metres
+MERCATOR_RADIUS = 6378137.0
+
+SHAPEFILE_PARTS = (".shp", ".shx", ".dbf", ".prj", ".cpg")
+
+# Bumped whenever the conversion changes, so older .npz files are rebuilt
+CACHE_FORMAT = 3
+
+
+class PointLayer:
+    """One layer's points as read-only lon/lat float64 arrays plus its attribute columns"""
+
+    def __init__(self, name, lon, lat, attributes):
+        self.name = name
+        self.lon = lon
+        self.lat = lat
+        self.attributes = attributes
+        # Shared by every session in the process, so nobody may modify them in place
+        for values in (lon, lat, *attributes.values()):
+            values.setflags(write=False)
+
+    def __len__(self):
+        return len(self.lon)
+
+    def __getitem__(self, column):
+        return self.attributes[column]
+
+
+def source_mtime(path):
+    """Latest modification time of `path`, including a shapefile's sidecar files"""
+    stem, ext = os.path.splitext(path)
+    parts = [stem + part for part in SHAPEFILE_PARTS] if ext.lower() == ".shp" else [path]
+    mtimes = [os.path.getmtime(part) for part in parts if os.path.exists(part)]
+    if not os.path.exists(path) or not mtimes:
+        raise FileNotFoundError(f"Geodata file not found: {path}")
+    return max(mtimes)
+
+
+def mercator_to_degrees(x, y):
+    """(lon, lat) in degrees of Web Mercator x/y in metres"""
+    return np.degrees(x / MERCATOR_RADIUS), np.degrees(2 * np.arctan(np.exp(y / MERCATOR_RADIUS)) - np.pi / 2)
+
+
+def read_source(path, swap_axes=False):
+    """Parse a GeoJSON/shapefile into (lon, lat, attributes) in WGS84.
+
+    Rows whose coordinates cannot be degrees (|x| > 180 or |y| > 90) are read
+    as Web Mercator metres, whatever CRS the file declares. `swap_axes`
+    reads x as the latitude.
+    """
+    import geopandas as gpd
+
+    frame = gpd.read_file(path)
+    if frame.crs is not None and frame.crs.to_epsg() != 4326:
+        frame = frame.to_crs(4326)
+    points = frame.geometry
+    if not (points.geom_type == "Point").all():
+        # Lines and polygons are plotted at a point guaranteed to lie on them
+        points = points.representative_point()
+    attributes = {}
+    for column in frame.columns:
+        if column == frame.geometry.name:
+            continue
+        values = frame[column].to_numpy()
+        attributes[column] = values.astype(str) if values.dtype == object else values
+    x, y = np.asarray(points.x, dtype=np.float64), np.asarray(points.y, dtype=np.float64)
+    metres = (np.abs(x) > 180) | (np.abs(y) > 90)
+    if metres.any():
+        x[metres], y[metres] = mercator_to_degrees(x[metres], y[metres])
+    return (y, x, attributes) if swap_axes else (x, y, attributes)
+
+
+def _cache_path(name):
+    return os.path.join(CACHE_DIR, f"{name}.npz")
+
+
+def _read_cache(name, mtime):
+    try:
+        with np.load(_cache_path(name), allow_pickle=False) as data:
+            if float(data["mtime"]) != mtime or int(data["format"]) != CACHE_FORMAT:
+                return None
+            attributes = {key[len("attr_"):]: data[key] for key in data.files if key.startswith("attr_")}
+            return PointLayer(name, data["lon"], data["lat"], attributes)
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _write_cache(layer, mtime):
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_path = f"{_cache_path(layer.name)}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, lon=layer.lon, lat=layer.lat, mtime=np.float64(mtime), format=CACHE_FORMAT,
+                     **{f"attr_{column}": values for column, values in layer.attributes.items()})
+        os.replace(tmp_path, _cache_path(layer.name))
+    except OSError:
+        # A read-only deployment still gets the in-memory copy
+        pass
+
+
+_layers = {}
+_layers_lock = threading.Lock()
+
+
+def load_layer(name):
+    """Return the PointLayer for `name` in LAYERS, parsing the source only if it changed"""
+    mtime = source_mtime(os.path.join(DATA_DIR, LAYERS[name]))
+    cached = _layers.get(name)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    with _layers_lock:
+        cached = _layers.get(name)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        layer = _read_cache(name, mtime)
+        if layer is None:
+            layer = PointLayer(name, *read_source(os.path.join(DATA_DIR, LAYERS[name]), name in SWAPPED_AXES))
+            _write_cache(layer, mtime)
+        _layers[name] = (mtime, layer)
+        return layer
+
+
+def build(names=None):
+    """Convert every layer (or `names`) to the .npz cache; returns {name: points}"""
+    return {name: len(load_layer(name)) for name in names or LAYERS}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-convert the dashboards' geodata layers")
+    parser.add_argument("command", choices=["build"])
+    parser.parse_args()
+    for name, n_points in build().items():
+        print(f"{name}: {n_points} points")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,209 @@
+"""Zoom-aware binning of point layers before they are handed to Plotly.
+
+    from map_aggregation import scatter_points
+
+    fig = scatter_points(load_layer("buildings"), zoom=5, color=scores, title="...")
+
+A scatter map ships every point to the browser, so payload and render time
+grow with the layer. Points are instead snapped to a square grid in Web
+Mercator whose cells are `cell_pixels` wide on screen at the given zoom, and
+each occupied cell becomes one marker at the centroid of its points, sized
+by how many it stands for. If a layer still has more than `max_markers`
+occupied cells the grid is coarsened until it has not, so a figure never
+carries more than that many markers however large the layer grows. Layers
+smaller than `max_markers` are drawn point for point, exactly as before.
+
+A regular grid of scores (e.g. suitability.score_grid) is not binned:
+`grid_map` draws it as an image layer with one block of pixels per cell, so
+every cell stays visible at any cell size and the payload is a small PNG.
+"""
+import base64
+import io
+import weakref
+
+import numpy as np
+import plotly.express as px
+
+# Screen size of a map tile at zoom 0, in pixels
+TILE_PIXELS = 256
+
+
+class Aggregate:
+    """Markers of an aggregated layer: centroid lon/lat, number of points and the colour value of each"""
+
+    def __init__(self, lon, lat, count, value=None):
+        self.lon = lon
+        self.lat = lat
+        self.count = count
+        self.value = value
+
+    def __len__(self):
+        return len(self.lon)
+
+    @property
+    def aggregated(self):
+        return bool(len(self.count)) and int(self.count.max()) > 1
+
+
+def mercator(lon, lat):
+    """Web Mercator x/y in radians, the projection of the map tiles"""
+    lat = np.clip(lat, -85.05, 85.05)
+    return np.radians(lon), np.log(np.tan(np.pi / 4 + np.radians(lat) / 2))
+
+
+def cell_size(zoom, cell_pixels=40):
+    """Width of a grid cell in Web Mercator radians at `zoom`"""
+    return 2 * np.pi * cell_pixels / (TILE_PIXELS * 2.0 ** zoom)
+
+
+def _combine(cells, n_cells, values):
+    """Colour value per cell: the mean of numeric values, else the most common category"""
+    if values.dtype.kind in "biuf":
+        return np.bincount(cells, weights=values, minlength=n_cells) / np.bincount(cells, minlength=n_cells)
+    categories, codes = np.unique(values, return_inverse=True)
+    counts = np.bincount(cells * len(categories) + codes, minlength=n_cells * len(categories))
+    return categories[counts.reshape(n_cells, len(categories)).argmax(axis=1)]
+
+
+def aggregate(lon, lat, zoom, values=None, max_markers=2000, cell_pixels=40):
+    """Bin points into at most `max_markers` weighted markers for a map drawn at `zoom`"""
+    if max_markers < 1:
+        # Coarsening never gets below one cell, so the loop below would not end
+        raise ValueError(f"max_markers must be at least 1, got {max_markers}")
+    lon = np.asarray(lon, dtype=np.float64)
+    lat = np.asarray(lat, dtype=np.float64)
+    values = None if values is None else np.asarray(values)
+    if len(lon) <= max_markers:
+        return Aggregate(lon, lat, np.ones(len(lon), dtype=np.int64), values)
+
+    x, y = mercator(lon, lat)
+    size = cell_size(zoom, cell_pixels)
+    col = np.floor(x / size).astype(np.int64)
+    row = np.floor(y / size).astype(np.int64)
+    col -= col.min()
+    row -= row.min()
+    while True:
+        width = int(col.max()) + 1
+        keys = row * width + col
+        n_keys = width * (int(row.max()) + 1)
+        if n_keys <= max(len(keys), 1 << 20):
+            # Small enough to count every cell of the grid, which avoids sorting the points
+            occupied = np.bincount(keys, minlength=n_keys) > 0
+            n_cells = int(np.count_nonzero(occupied))
+        else:
+            occupied = None
+            n_cells = len(np.unique(keys))
+        if n_cells <= max_markers:
+            break
+        # Twice the cell width: merge each 2x2 block of cells
+        col >>= 1
+        row >>= 1
+
+    if occupied is not None:
+        cells = (np.cumsum(occupied) - 1)[keys]
+    else:
+        cells = np.unique(keys, return_inverse=True)[1]
+    count = np.bincount(cells, minlength=n_cells)
+    return Aggregate(
+        np.bincount(cells, weights=lon, minlength=n_cells) / count,
+        np.bincount(cells, weights=lat, minlength=n_cells) / count,
+        count,
+        None if values is None else _combine(cells, n_cells, values),
+    )
+
+
+# Aggregates of the shared geodata layers, per (zoom, max_markers); freed with the layer
+_layer_aggregates = weakref.WeakKeyDictionary()
+
+
+def aggregate_layer(layer, zoom, max_markers=2000):
+    """aggregate() for a geodata.PointLayer, computed once per layer and zoom"""
+    cached = _layer_aggregates.setdefault(layer, {})
+    key = (zoom, max_markers)
+    if key not in cached:
+        cached[key] = aggregate(layer.lon, layer.lat, zoom, max_markers=max_markers)
+    return cached[key]
+
+
+def scatter_points(layer, zoom, color=None, labels=None, max_markers=2000, max_size=20, **kwargs):
+    """px.scatter_mapbox of a PointLayer, binned at `zoom` when it has more than `max_markers` points.
+
+    `color` is an optional array with one value per point; binned markers show
+    the mean of numeric values or the most common category.
+    """
+    if color is None:
+        markers = aggregate_layer(layer, zoom, max_markers)
+    else:
+        markers = aggregate(layer.lon, layer.lat, zoom, values=color, max_markers=max_markers)
+    if not markers.aggregated:
+        return px.scatter_mapbox(lat=markers.lat, lon=markers.lon, color=markers.value, labels=labels,
+                                 zoom=zoom, **kwargs)
+    labels = {"size": "points", **(labels or {})}
+    return px.scatter_mapbox(lat=markers.lat, lon=markers.lon, color=markers.value, size=markers.count,
+                             size_max=max_size, labels=labels, zoom=zoom, **kwargs)
+
+
+def grid_image(lon, lat, values, colorscale="Viridis", range_color=None, max_pixels=1024):
+    """PNG data URL of a regular lon/lat grid and its corner coordinates, as a map image source.
+
+    Cells without a value (NaN, or missing from `lon`/`lat`) are transparent.
+    Rows are resampled to even Web Mercator spacing, which is how the map
+    stretches an image between its corners.
+    """
+    from PIL import Image
+    from plotly.colors import get_colorscale, sample_colorscale, unlabel_rgb
+
+    lon = np.asarray(lon, dtype=np.float64)
+    lat = np.asarray(lat, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    lons, lats = np.unique(lon), np.unique(lat)
+    lon_step = lons[1] - lons[0] if len(lons) > 1 else 1.0
+    lat_step = lats[1] - lats[0] if len(lats) > 1 else 1.0
+    cells = np.full((len(lats), len(lons)), np.nan)
+    cells[np.searchsorted(lats, lat), np.searchsorted(lons, lon)] = values
+    west, east = lons[0] - lon_step / 2, lons[-1] + lon_step / 2
+    south, north = lats[0] - lat_step / 2, lats[-1] + lat_step / 2
+
+    # Nearest-cell resampling to whole pixel blocks, top row first
+    scale = max(1, max_pixels // max(len(lons), len(lats)))
+    _, y_north = mercator(0.0, north)
+    _, y_south = mercator(0.0, south)
+    y = y_north + (np.arange(len(lats) * scale) + 0.5) * (y_south - y_north) / (len(lats) * scale)
+    rows = np.clip(((np.degrees(2 * np.arctan(np.exp(y)) - np.pi / 2) - south) / lat_step).astype(np.int64),
+                   0, len(lats) - 1)
+    cols = np.arange(len(lons) * scale) // scale
+    cells = cells[rows][:, cols]
+
+    low, high = range_color or (np.nanmin(values), np.nanmax(values))
+    palette = np.array([unlabel_rgb(c) for c in sample_colorscale(get_colorscale(colorscale), np.linspace(0, 1, 256))])
+    shade = np.clip((cells - low) / ((high - low) or 1.0), 0, 1)
+    pixels = np.zeros(cells.shape + (4,), dtype=np.uint8)
+    known = ~np.isnan(cells)
+    pixels[known, :3] = palette[(shade[known] * 255).round().astype(np.int64)]
+    pixels[known, 3] = 255
+    out = io.BytesIO()
+    Image.fromarray(pixels, "RGBA").save(out, format="PNG", optimize=True)
+    source = "data:image/png;base64," + base64.b64encode(out.getvalue()).decode("ascii")
+    return source, [[west, north], [east, north], [east, south], [west, south]]
+
+
+def grid_map(lon, lat, values, zoom, labels=None, colorscale="Viridis", range_color=None, opacity=0.6,
+             max_markers=2000, **kwargs):
+    """Map of a regular lon/lat grid of values drawn as an image layer, one pixel block per cell.
+
+    The image carries the full resolution of the grid. Invisible markers, binned
+    like scatter_points, provide the colour bar and show each area's mean on hover.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    known = ~np.isnan(values)
+    if range_color is None:
+        range_color = (float(values[known].min()), float(values[known].max())) if known.any() else (0.0, 1.0)
+    source, corners = grid_image(lon, lat, values, colorscale, range_color)
+    markers = aggregate(np.asarray(lon)[known], np.asarray(lat)[known], zoom, values=values[known],
+                        max_markers=max_markers)
+    fig = px.scatter_mapbox(lat=markers.lat, lon=markers.lon, color=markers.value, labels=labels, zoom=zoom,
+                            color_continuous_scale=colorscale, range_color=range_color, **kwargs)
+    fig.update_traces(marker_opacity=0)
+    fig.update_layout(mapbox={"layers": [{"sourcetype": "image", "source": source, "coordinates": corners,
+                                          "opacity": opacity, "below": "traces"}]})
+    return fig
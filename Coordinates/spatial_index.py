@@ -0,0 +1,130 @@
+"""Nearest-charger and coverage queries over point layers.
+
+    from spatial_index import get_spatial_index
+
+    stations = get_spatial_index(load_layer("current_charging_stations"))
+    km, nearest = stations.nearest(buildings.lon, buildings.lat)
+    covered = stations.covered(buildings.lon, buildings.lat, radius_km=20)
+
+Points are placed on the unit sphere and indexed with a k-d tree, so a
+straight-line (chord) query is exact for great-circle distance: the chord
+grows monotonically with the arc, and converting the radius to a chord
+and the chord back to kilometres gives haversine distances without any
+flat-earth error. Every query is vectorised over whole arrays, and
+accepts a PointLayer, a GeoDataFrame of points or separate lon/lat arrays.
+"""
+import threading
+import weakref
+
+import numpy as np
+
+# Mean Earth radius (IUGG), in km
+EARTH_RADIUS_KM = 6371.0088
+
+# lon_min, lat_min, lon_max, lat_max of South Africa
+SOUTH_AFRICA_BOUNDS = (16.3, -35.0, 33.0, -22.1)
+
+
+def coordinates(points, lat=None):
+    """(lon, lat) float64 arrays from a PointLayer, a GeoDataFrame/GeoSeries of points, or lon and lat"""
+    if lat is not None:
+        lon = points
+    elif hasattr(points, "lon"):
+        lon, lat = points.lon, points.lat
+    else:
+        geometry = getattr(points, "geometry", points)
+        lon, lat = geometry.x, geometry.y
+    return np.asarray(lon, dtype=np.float64), np.asarray(lat, dtype=np.float64)
+
+
+def unit_vectors(lon, lat):
+    lon, lat = np.radians(lon), np.radians(lat)
+    cos_lat = np.cos(lat)
+    return np.column_stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)])
+
+
+def chord_to_km(chord):
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(chord, 2.0) / 2)
+
+
+def km_to_chord(km):
+    return 2 * np.sin(np.minimum(km / EARTH_RADIUS_KM, np.pi) / 2)
+
+
+def haversine_km(lon1, lat1, lon2, lat2):
+    """Great-circle distance between points, element-wise"""
+    lon1, lat1, lon2, lat2 = (np.radians(v) for v in (lon1, lat1, lon2, lat2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+class SpatialIndex:
+    """k-d tree over the points of one layer, queried in great-circle kilometres"""
+
+    def __init__(self, points, lat=None):
+        from scipy.spatial import cKDTree
+
+        self.lon, self.lat = coordinates(points, lat)
+        self.tree = cKDTree(unit_vectors(self.lon, self.lat))
+
+    def __len__(self):
+        return len(self.lon)
+
+    def nearest(self, points, lat=None, k=1, max_km=np.inf):
+        """Distance in km to, and index of, the nearest `k` indexed points of each query point.
+
+        Neighbours beyond `max_km` come back as distance inf and index len(self).
+        """
+        chord, index = self.tree.query(unit_vectors(*coordinates(points, lat)), k=k,
+                                       distance_upper_bound=km_to_chord(max_km) if np.isfinite(max_km) else np.inf)
+        return chord_to_km(chord), index
+
+    def covered(self, points, lat=None, radius_km=20.0):
+        """Whether each query point has an indexed point within `radius_km`"""
+        distance, _ = self.nearest(points, lat, max_km=radius_km)
+        return distance <= radius_km
+
+    def count_within(self, points, lat=None, radius_km=20.0):
+        """How many indexed points lie within `radius_km` of each query point"""
+        return self.tree.query_ball_point(unit_vectors(*coordinates(points, lat)), km_to_chord(radius_km),
+                                          return_length=True)
+
+    def within(self, points, lat=None, radius_km=20.0):
+        """Indices of the indexed points within `radius_km` of each query point, as a list of lists"""
+        return self.tree.query_ball_point(unit_vectors(*coordinates(points, lat)), km_to_chord(radius_km))
+
+
+def nearest_of(indexes, points, lat=None):
+    """Distance in km from each query point to the nearest point of any of `indexes`"""
+    lon, lat = coordinates(points, lat)
+    distance = np.full(len(lon), np.inf)
+    for index in indexes:
+        if len(index):
+            distance = np.minimum(distance, index.nearest(lon, lat)[0])
+    return distance
+
+
+def grid_points(bounds=SOUTH_AFRICA_BOUNDS, cell_km=10.0):
+    """Centres of a regular lon/lat grid over `bounds` with cells about `cell_km` on a side"""
+    lon_min, lat_min, lon_max, lat_max = bounds
+    lat_step = np.degrees(cell_km / EARTH_RADIUS_KM)
+    lon_step = lat_step / np.cos(np.radians((lat_min + lat_max) / 2))
+    lon, lat = np.meshgrid(np.arange(lon_min + lon_step / 2, lon_max, lon_step),
+                           np.arange(lat_min + lat_step / 2, lat_max, lat_step))
+    return lon.ravel(), lat.ravel()
+
+
+# Indexes of the shared geodata layers; freed with the layer when its source changes
+_indexes = weakref.WeakKeyDictionary()
+_indexes_lock = threading.Lock()
+
+
+def get_spatial_index(layer):
+    """Return the SpatialIndex of a geodata.PointLayer, built once per process"""
+    index = _indexes.get(layer)
+    if index is None:
+        with _indexes_lock:
+            index = _indexes.get(layer)
+            if index is None:
+                index = _indexes[layer] = SpatialIndex(layer)
+    return index
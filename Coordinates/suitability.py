@@ -0,0 +1,137 @@
+"""Grid-based suitability scores for EV charger placement.
+
+    from suitability import DEFAULT_WEIGHTS, score_grid, score_points
+
+    grid, scores = score_grid(DEFAULT_WEIGHTS, cell_km=10)
+    site_scores = score_points(load_layer("fast_chargers"), DEFAULT_WEIGHTS)
+
+South Africa is divided into square cells about `cell_km` on a side, and
+every cell (or any other point) gets four features in [0, 1]:
+
+    power_grid         exp(-km to the nearest power grid point / 25 km)
+    roads              exp(-km to the nearest road point / 25 km)
+    population         the same decay to the nearest low/medium/high density
+                       point, scaled by 1/3, 2/3 or 1 for its density level
+    existing_stations  charging stations within 20 km, saturating at 5
+
+The score is the weighted sum of the features rescaled to 0-100 by the
+lowest and highest sums the weights allow. Features are computed once per
+cell size and source layers; a weight change only repeats the
+(cells x 4) @ (4,) product, which takes well under a millisecond.
+"""
+import functools
+
+import numpy as np
+
+from geodata import load_layer
+from spatial_index import SOUTH_AFRICA_BOUNDS, coordinates, get_spatial_index, grid_points
+
+FEATURES = ("power_grid", "roads", "population", "existing_stations")
+
+FEATURE_LABELS = {
+    "power_grid": "Power grid proximity",
+    "roads": "Road access",
+    "population": "Population density",
+    "existing_stations": "Existing stations nearby",
+}
+
+# Nearby stations already serve an area, so they count against it by default
+DEFAULT_WEIGHTS = {"power_grid": 0.3, "roads": 0.3, "population": 0.4, "existing_stations": -0.2}
+
+# Density layer -> relative population of its points
+DENSITY_LEVELS = {"low_density": 1 / 3, "population_density": 2 / 3, "high_density": 1.0}
+
+# Every geodata layer the features are computed from
+SOURCE_LAYERS = ("power_grid", "roads", *DENSITY_LEVELS, "current_charging_stations")
+
+DISTANCE_SCALE_KM = 25.0
+STATION_RADIUS_KM = 20.0
+STATION_SATURATION = 5
+
+
+class GridFeatures:
+    """Centres of the grid cells and their (cells x FEATURES) feature matrix"""
+
+    def __init__(self, lon, lat, features):
+        self.lon = lon
+        self.lat = lat
+        self.features = features
+        for values in (lon, lat, features):
+            values.setflags(write=False)
+
+    def __len__(self):
+        return len(self.lon)
+
+
+def _source_layers():
+    # load_layer returns new objects when a source changes, which invalidates the caches below
+    return tuple(load_layer(name) for name in SOURCE_LAYERS)
+
+
+def features_at(lon, lat, layers=None):
+    """(points x FEATURES) feature matrix for arbitrary points"""
+    sources = dict(zip(SOURCE_LAYERS, layers or _source_layers()))
+
+    def proximity(name):
+        distance, _ = get_spatial_index(sources[name]).nearest(lon, lat)
+        return np.exp(-distance / DISTANCE_SCALE_KM)
+
+    population = np.max([level * proximity(name) for name, level in DENSITY_LEVELS.items()], axis=0)
+    stations = get_spatial_index(sources["current_charging_stations"]).count_within(
+        lon, lat, radius_km=STATION_RADIUS_KM)
+    return np.column_stack([
+        proximity("power_grid"),
+        proximity("roads"),
+        population,
+        np.minimum(stations / STATION_SATURATION, 1.0),
+    ])
+
+
+@functools.lru_cache(maxsize=8)
+def _grid_features(cell_km, bounds, layers):
+    lon, lat = grid_points(bounds, cell_km)
+    return GridFeatures(lon, lat, features_at(lon, lat, layers))
+
+
+def grid_features(cell_km=10.0, bounds=SOUTH_AFRICA_BOUNDS):
+    """GridFeatures of the grid over `bounds`, computed once per cell size and source data"""
+    return _grid_features(float(cell_km), tuple(bounds), _source_layers())
+
+
+def weight_vector(weights):
+    """Weights as an array in FEATURES order; missing features weigh 0"""
+    return np.array([float(weights.get(name, 0.0)) for name in FEATURES])
+
+
+def combine(features, weights):
+    """Scores in 0-100 from a feature matrix and a {feature: weight} mapping"""
+    w = weight_vector(weights)
+    low, high = w[w < 0].sum(), w[w > 0].sum()
+    if high == low:
+        return np.zeros(len(features))
+    return (features @ w - low) * (100.0 / (high - low))
+
+
+@functools.lru_cache(maxsize=64)
+def _grid_scores(grid, weights):
+    scores = combine(grid.features, dict(weights))
+    scores.setflags(write=False)
+    return scores
+
+
+def score_grid(weights=DEFAULT_WEIGHTS, cell_km=10.0, bounds=SOUTH_AFRICA_BOUNDS):
+    """(GridFeatures, scores) of every cell; scores are cached per cell size and weights"""
+    grid = grid_features(cell_km, bounds)
+    return grid, _grid_scores(grid, tuple((name, float(weights.get(name, 0.0))) for name in FEATURES))
+
+
+@functools.lru_cache(maxsize=32)
+def _point_features(layer, layers):
+    features = features_at(*coordinates(layer), layers)
+    features.setflags(write=False)
+    return features
+
+
+def score_points(layer, weights=DEFAULT_WEIGHTS):
+    """Scores in 0-100 of the points of a geodata.PointLayer, e.g. candidate charger sites"""
+    return combine(_point_features(layer, _source_layers()), weights)
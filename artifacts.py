@@ -0,0 +1,235 @@
+"""Compact, memory-mappable model artifacts.
+
+`export` converts the pickled TF-IDF vectorizer and the linear models into
+plain NumPy files:
+
+    manifest.json        classes, vectorizer settings and one entry per model
+    vocab_terms.bin      UTF-8 terms in column order
+    vocab_offsets.npy    start offset of each term in vocab_terms.bin (int64)
+    idf.npy              IDF weights (float32)
+    <model>.weights.npy  (n_features, n_outputs) weight matrix (float32)
+    <model>.bias.npy     per-output bias (float32)
+
+`load_artifacts` memory-maps these read-only, so worker processes loading the
+same directory share the pages through the OS page cache instead of each
+unpickling its own copy of every dict and matrix. The term -> column dict
+used by `transform` is decoded from vocab_terms.bin once, on first use.
+
+    python artifacts.py export [--out artifacts]
+"""
+import argparse
+import json
+import os
+import re
+import threading
+
+import numpy as np
+import scipy.sparse as sp
+
+from config import artifact_dir
+from linear_engine import LINEAR_MODEL_KEYS, LinearModel
+
+FORMAT_VERSION = 1
+
+
+class CompactVectorizer:
+    """TF-IDF transform rebuilt from exported arrays, matching TfidfVectorizer.transform"""
+
+    def __init__(self, idf, terms_blob, offsets, settings):
+        self.idf = idf
+        self.terms_blob = terms_blob
+        self.offsets = offsets
+        self.lowercase = settings["lowercase"]
+        self.norm = settings["norm"]
+        self.sublinear_tf = settings["sublinear_tf"]
+        self.token_pattern = re.compile(settings["token_pattern"])
+        self._vocabulary = None
+        self._vocabulary_lock = threading.Lock()
+
+    @property
+    def n_features(self):
+        return len(self.idf)
+
+    def term(self, column):
+        start = self.offsets[column]
+        end = self.offsets[column + 1] if column + 1 < len(self.offsets) else len(self.terms_blob)
+        return bytes(self.terms_blob[start:end]).decode("utf-8")
+
+    @property
+    def vocabulary(self):
+        """term -> column dict, decoded once from the terms blob on first use"""
+        if self._vocabulary is None:
+            with self._vocabulary_lock:
+                if self._vocabulary is None:
+                    blob = bytes(self.terms_blob)
+                    ends = np.append(self.offsets[1:], len(blob)).tolist()
+                    self._vocabulary = {blob[start:end].decode("utf-8"): column
+                                        for column, (start, end) in enumerate(zip(self.offsets.tolist(), ends))}
+        return self._vocabulary
+
+    def lookup(self, terms):
+        """Column index of each term, or -1 for out-of-vocabulary terms"""
+        vocabulary = self.vocabulary
+        return np.fromiter((vocabulary.get(t, -1) for t in terms), dtype=np.int64, count=len(terms))
+
+    def transform(self, texts):
+        get = self.vocabulary.get
+        indptr, indices = [0], []
+        for text in texts:
+            if self.lowercase:
+                text = text.lower()
+            indices.extend(column for column in map(get, self.token_pattern.findall(text)) if column is not None)
+            indptr.append(len(indices))
+        # Summing duplicate columns gives the term counts, with each row's columns sorted
+        X = sp.csr_matrix((np.ones(len(indices)), np.asarray(indices, dtype=np.int64), np.asarray(indptr)),
+                          shape=(len(indptr) - 1, self.n_features))
+        X.sum_duplicates()
+        if self.sublinear_tf:
+            np.log(X.data, out=X.data)
+            X.data += 1
+        X.data *= self.idf[X.indices]
+        if self.norm in ("l1", "l2"):
+            rows = np.repeat(np.arange(X.shape[0]), np.diff(X.indptr))
+            if self.norm == "l2":
+                norms = np.sqrt(np.bincount(rows, weights=X.data ** 2, minlength=X.shape[0]))
+            else:
+                norms = np.bincount(rows, weights=np.abs(X.data), minlength=X.shape[0])
+            X.data /= norms[rows]
+        return X
+
+
+# TfidfVectorizer settings CompactVectorizer reproduces only at these values
+SUPPORTED_SETTINGS = {
+    "analyzer": "word",
+    "preprocessor": None,
+    "tokenizer": None,
+    "stop_words": None,
+    "strip_accents": None,
+    "ngram_range": (1, 1),
+    "binary": False,
+    "use_idf": True,
+}
+
+
+def check_vectorizer(vectorizer):
+    """Raise ValueError if CompactVectorizer would transform differently from `vectorizer`"""
+    problems = []
+    for name, supported in SUPPORTED_SETTINGS.items():
+        value = getattr(vectorizer, name, supported)
+        if (tuple(value) if isinstance(value, list) else value) != supported:
+            problems.append(f"{name}={value!r}")
+    if not isinstance(vectorizer.token_pattern, str):
+        problems.append(f"token_pattern={vectorizer.token_pattern!r}")
+    if vectorizer.norm not in ("l1", "l2", None):
+        problems.append(f"norm={vectorizer.norm!r}")
+    if problems:
+        raise ValueError(f"Cannot export a vectorizer with {', '.join(problems)}; "
+                         f"the compact transform only supports word unigrams with IDF")
+
+
+def export_artifacts(vectorizer, model_objects, out_dir):
+    """Write the vectorizer and each linear model in `model_objects` to `out_dir`.
+
+    Raises ValueError, before writing anything, for vectorizer settings the
+    compact transform does not support.
+    """
+    check_vectorizer(vectorizer)
+    os.makedirs(out_dir, exist_ok=True)
+
+    terms = [None] * len(vectorizer.vocabulary_)
+    for term, column in vectorizer.vocabulary_.items():
+        terms[column] = term
+    encoded = [t.encode("utf-8") for t in terms]
+    offsets = np.zeros(len(encoded), dtype=np.int64)
+    offsets[1:] = np.cumsum([len(b) for b in encoded])[:-1]
+
+    np.save(os.path.join(out_dir, "vocab_offsets.npy"), offsets)
+    np.save(os.path.join(out_dir, "idf.npy"), vectorizer.idf_.astype(np.float32))
+    with open(os.path.join(out_dir, "vocab_terms.bin"), "wb") as f:
+        f.write(b"".join(encoded))
+
+    manifest = {
+        "format": FORMAT_VERSION,
+        "vectorizer": {
+            "lowercase": vectorizer.lowercase,
+            "token_pattern": vectorizer.token_pattern,
+            "norm": vectorizer.norm,
+            "sublinear_tf": vectorizer.sublinear_tf,
+        },
+        "models": {},
+    }
+    for key, model in model_objects.items():
+        manifest["models"][key] = export_model(model, key, out_dir)
+    write_manifest(manifest, out_dir)
+    return manifest
+
+
+def export_model(model, key, out_dir):
+    """Write one linear model's weights and bias to `out_dir`; returns its manifest entry"""
+    linear = LinearModel.from_estimator(model, dtype=np.float32)
+    np.save(os.path.join(out_dir, f"{key}.weights.npy"), linear.weights)
+    np.save(os.path.join(out_dir, f"{key}.bias.npy"), linear.bias)
+    return {"kind": linear.kind, "classes": [str(c) for c in model.classes_]}
+
+
+def write_manifest(manifest, out_dir):
+    with open(os.path.join(out_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+
+def read_manifest(directory):
+    path = os.path.join(directory, "manifest.json")
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_vectorizer(directory, manifest=None, mmap=True):
+    manifest = manifest or read_manifest(directory)
+    mode = "r" if mmap else None
+    load = lambda name: np.load(os.path.join(directory, name), mmap_mode=mode)
+    blob_path = os.path.join(directory, "vocab_terms.bin")
+    terms_blob = np.memmap(blob_path, dtype=np.uint8, mode="r") if mmap else np.fromfile(blob_path, np.uint8)
+    return CompactVectorizer(load("idf.npy"), terms_blob, load("vocab_offsets.npy"), manifest["vectorizer"])
+
+
+def load_model(directory, key, manifest=None, mmap=True):
+    manifest = manifest or read_manifest(directory)
+    entry = manifest["models"][key]
+    mode = "r" if mmap else None
+    weights = np.load(os.path.join(directory, f"{key}.weights.npy"), mmap_mode=mode)
+    bias = np.load(os.path.join(directory, f"{key}.bias.npy"))
+    return LinearModel(entry["kind"], weights, bias, entry["classes"])
+
+
+def load_artifacts(directory, mmap=True):
+    """Return (vectorizer, {model_key: classifier}) rebuilt from an exported directory"""
+    manifest = read_manifest(directory)
+    if manifest is None:
+        raise FileNotFoundError(f"No manifest.json in {directory}")
+    vectorizer = load_vectorizer(directory, manifest, mmap)
+    return vectorizer, {key: load_model(directory, key, manifest, mmap) for key in manifest["models"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export models to compact memory-mappable artifacts")
+    parser.add_argument("command", choices=["export"])
+    parser.add_argument("--out", default=artifact_dir)
+    args = parser.parse_args()
+
+    from model_registry import ModelRegistry
+
+    # Read the original pickles, even if compact artifacts already exist
+    registry = ModelRegistry(artifact_dir=None, linear_engine=False)
+    model_objects = {key: registry.get(key) for key in LINEAR_MODEL_KEYS if registry.available(key)}
+    try:
+        manifest = export_artifacts(registry.vectorizer(), model_objects, args.out)
+    except ValueError as e:
+        parser.error(str(e))
+    size = sum(os.path.getsize(os.path.join(args.out, f)) for f in os.listdir(args.out))
+    print(f"Exported vectorizer and {', '.join(manifest['models'])} to {args.out} ({size / 1e6:.1f} MB)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+"""Pre-resized, re-encoded copies of the images shown in the app.
+
+The source PNG/JPEG files are several times larger than what the page
+displays, so each one is resized to its display width, re-encoded as WebP
+and kept in a byte-bounded in-memory cache. Run
+
+    python assets.py build
+
+at build time to write the encoded copies to `.asset_cache/`; the app then
+only reads those small files, and only once per process.
+"""
+import argparse
+import io
+import os
+import threading
+from collections import OrderedDict
+
+from config import base_dir, paths
+from metrics import get_metrics
+
+CACHE_DIR = os.path.join(base_dir, ".asset_cache")
+
+# Streamlit's centered layout is 704px wide; images without a width fill it
+CONTAINER_WIDTH = 704
+
+# Width each image is displayed at, keyed like `paths`
+display_widths = {
+    "announcement_image": CONTAINER_WIDTH,
+    "class_dist": CONTAINER_WIDTH,
+    "balanced_class_dist": CONTAINER_WIDTH,
+    "new_word_cloud": CONTAINER_WIDTH,
+    "logo_image": 300,
+}
+
+
+def encoded_format():
+    """File extension of the encoded images: "webp", or "png" where Pillow lacks WebP support"""
+    from PIL import features
+
+    return "webp" if features.check("webp") else "png"
+
+
+def encode_image(path, width, quality=85):
+    """Resize `path` to at most `width` pixels wide and return WebP (or PNG) bytes"""
+    from PIL import Image
+
+    with Image.open(path) as image:
+        image.load()
+        if image.width > width:
+            height = round(image.height * width / image.width)
+            image = image.resize((width, height), Image.LANCZOS)
+        out = io.BytesIO()
+        if encoded_format() == "webp":
+            image.save(out, format="WEBP", quality=quality, method=4)
+        else:
+            image.save(out, format="PNG", optimize=True)
+    return out.getvalue()
+
+
+def _cache_file(key, width):
+    return os.path.join(CACHE_DIR, f"{key}.{width}.{encoded_format()}")
+
+
+class AssetCache:
+    """LRU cache of encoded image bytes, bounded by total size rather than entry count"""
+
+    def __init__(self, max_bytes=16 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, width=None):
+        """Return display-ready bytes for the image stored under `key` in `paths`"""
+        width = width or display_widths.get(key, CONTAINER_WIDTH)
+        source = paths[key]
+        cache_key = (key, width, os.path.getmtime(source))
+        with self._lock:
+            data = self._entries.get(cache_key)
+            if data is not None:
+                self._entries.move_to_end(cache_key)
+                self.hits += 1
+                return data
+            self.misses += 1
+
+        data = self._load(key, width, source)
+        with self._lock:
+            if cache_key not in self._entries and len(data) <= self.max_bytes:
+                self._entries[cache_key] = data
+                self.size += len(data)
+                while self.size > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self.size -= len(evicted)
+        return data
+
+    def _load(self, key, width, source):
+        # Prefer the copy written by `python assets.py build` if it is up to date
+        built = _cache_file(key, width)
+        if os.path.exists(built) and os.path.getmtime(built) >= os.path.getmtime(source):
+            with open(built, "rb") as f:
+                return f.read()
+        return encode_image(source, width)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {"entries": len(self._entries), "bytes": self.size, "max_bytes": self.max_bytes,
+                "hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0}
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_asset_cache():
+    """Return the image cache shared by every session in this process"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = AssetCache()
+                get_metrics().register_collector("asset_cache", _cache.stats)
+    return _cache
+
+
+def build(keys=None):
+    """Encode every display image into CACHE_DIR; returns {key: (source_bytes, built_bytes)}"""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    sizes = {}
+    for key in keys or display_widths:
+        width = display_widths[key]
+        data = encode_image(paths[key], width)
+        with open(_cache_file(key, width), "wb") as f:
+            f.write(data)
+        sizes[key] = (os.path.getsize(paths[key]), len(data))
+    return sizes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-encode the app's images at their display size")
+    parser.add_argument("command", choices=["build"])
+    parser.parse_args()
+    for key, (before, after) in build().items():
+        print(f"{key}: {before / 1024:.0f} KB -> {after / 1024:.0f} KB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+import io
+import json
+import os
+import time
+
+import pandas as pd
+
+# Columns tried, in order, when the caller does not name the article text column
+TEXT_COLUMNS = ["content", "text", "description", "headlines"]
+
+
+def detect_format(name):
+    """Guess the archive format from a file name: 'csv', 'json' or 'jsonl'"""
+    ext = os.path.splitext(str(name))[1].lower()
+    if ext == ".json":
+        return "json"
+    return "jsonl" if ext in (".jsonl", ".ndjson") else "csv"
+
+
+def _read_json(source, chunk_size):
+    """DataFrame chunks of a JSON array of articles, or an object with an "articles" list.
+
+    A document that is not a single JSON value is read as JSON lines instead,
+    since .json is also a common extension for those.
+    """
+    if hasattr(source, "read"):
+        raw = source.read()
+    else:
+        with open(source, "rb") as f:
+            raw = f.read()
+    text = raw.decode("utf-8") if isinstance(raw, bytes) else raw
+    try:
+        document = json.loads(text)
+    except json.JSONDecodeError:
+        yield from pd.read_json(io.StringIO(text), lines=True, chunksize=chunk_size, dtype=False)
+        return
+    if isinstance(document, dict):
+        if not isinstance(document.get("articles"), list):
+            raise ValueError('A JSON object must hold its articles in an "articles" list')
+        document = document["articles"]
+    elif not isinstance(document, list):
+        raise ValueError('Expected a JSON array of articles or an object with an "articles" list')
+    for start in range(0, len(document), chunk_size):
+        yield pd.DataFrame.from_records(document[start:start + chunk_size])
+
+
+def read_articles(source, fmt=None, chunk_size=1000):
+    """Stream a CSV, JSON-lines or JSON file as DataFrames of at most `chunk_size` rows.
+
+    `source` may be a path or a file-like object (e.g. a Streamlit upload), so
+    CSV and JSON-lines archives never have to be held in memory at once. A
+    JSON document is parsed whole, then chunked.
+    """
+    fmt = fmt or detect_format(getattr(source, "name", source))
+    if fmt == "json":
+        return _read_json(source, chunk_size)
+    if fmt == "jsonl":
+        return pd.read_json(source, lines=True, chunksize=chunk_size, dtype=False)
+    return pd.read_csv(source, chunksize=chunk_size)
+
+
+def resolve_text_column(columns, text_column=None):
+    if text_column:
+        if text_column not in columns:
+            raise ValueError(f"Column '{text_column}' not found. Available columns: {list(columns)}")
+        return text_column
+    for name in TEXT_COLUMNS:
+        if name in columns:
+            return name
+    raise ValueError(f"No text column found. Expected one of {TEXT_COLUMNS}, got {list(columns)}")
+
+
+def classify_chunks(chunks, model, vectorizer, text_column=None):
+    """Classify each DataFrame chunk with one transform and one predict call.
+
+    Every chunk is vectorised into a single sparse matrix, so scikit-learn does
+    the per-article work in compiled code instead of a Python loop.
+    """
+    for chunk in chunks:
+        column = resolve_text_column(chunk.columns, text_column)
+        texts = chunk[column].fillna("").astype(str)
+        vect_text = vectorizer.transform(texts)
+        yield chunk.assign(prediction=model.predict(vect_text))
+
+
+def classify_to_csv(source, model, vectorizer, fmt=None, chunk_size=1000, text_column=None,
+                    on_chunk=None):
+    """Classify a whole file and return (csv_bytes, n_articles, seconds).
+
+    `on_chunk(n_done)` is called after each chunk so callers can report progress.
+    """
+    out = io.StringIO()
+    n_done = 0
+    start = time.perf_counter()
+    chunks = read_articles(source, fmt=fmt, chunk_size=chunk_size)
+    for result in classify_chunks(chunks, model, vectorizer, text_column):
+        result.to_csv(out, header=n_done == 0, index=False)
+        n_done += len(result)
+        if on_chunk is not None:
+            on_chunk(n_done)
+    return out.getvalue().encode("utf-8"), n_done, time.perf_counter() - start
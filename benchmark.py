@@ -0,0 +1,234 @@
+"""Benchmark the classification path: model load, transform, predict and end-to-end.
+
+    python benchmark.py --out bench.json                   # run and write a report
+    python benchmark.py --save-baseline bench_baseline.json
+    python benchmark.py --baseline bench_baseline.json     # exit 1 on regressions
+    python benchmark.py --startup-only                     # exit 1 if the app starts too slowly
+
+Every metric is the median wall-clock time in seconds over `--repeat` runs.
+A metric regresses when it is more than `--tolerance` (default 25%) slower than
+the baseline and the difference exceeds `--min-delta` seconds.
+
+The startup check imports the app and renders its first page in a fresh
+interpreter, as a new container would, and fails when that takes longer than
+`--startup-budget` seconds or when importing the app pulls in a heavy
+dependency that only some pages need.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+from config import base_dir, paths
+
+ARTICLE_WORDS = [100, 1000, 5000, 20000]
+
+# Seconds allowed for importing the app plus rendering its Home page in a new process
+STARTUP_BUDGET = 2.0
+
+# Modules the app must not import before a page needs them
+LAZY_MODULES = ["sklearn", "joblib", "pandas", "scipy", "plotly.express"]
+BATCH_SIZES = [1, 10, 100, 1000, 10000]
+
+_COLD_LOAD = """
+import json, sys, time
+start = time.perf_counter()
+from model_registry import ModelRegistry
+registry = ModelRegistry()
+registry.get(sys.argv[1])
+print(json.dumps({"seconds": time.perf_counter() - start}))
+"""
+
+_STARTUP = """
+import json, sys, time
+start = time.perf_counter()
+import untitled
+imported = time.perf_counter() - start
+heavy = [name for name in sys.argv[1:] if name in sys.modules]
+from streamlit.testing.v1 import AppTest
+start = time.perf_counter()
+app = AppTest.from_file("base_app.py", default_timeout=60).run()
+print(json.dumps({"import": imported, "first_render": time.perf_counter() - start,
+                  "eager_modules": heavy, "errors": [e.value for e in app.exception]}))
+"""
+
+
+def synthetic_articles(vectorizer, n_articles, n_words, seed=0):
+    """Articles of exactly `n_words` words drawn from the vocabulary"""
+    terms = getattr(vectorizer, "vocabulary_", None)
+    if terms is None:
+        terms = [vectorizer.term(i) for i in range(0, vectorizer.n_features)]
+    words = sorted(terms)
+    rng = random.Random(seed)
+    return [" ".join(rng.choices(words, k=n_words)) for _ in range(n_articles)]
+
+
+def timed(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def cold_load(key):
+    """Import and load one artifact in a fresh interpreter, as a new worker would"""
+    out = subprocess.run([sys.executable, "-W", "ignore", "-c", _COLD_LOAD, key],
+                         cwd=base_dir, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])["seconds"]
+
+
+def startup(repeat=3):
+    """Median import and first-render seconds of the app in fresh interpreters"""
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-W", "ignore", "-c", _STARTUP, *LAZY_MODULES],
+                             cwd=base_dir, capture_output=True, text=True, check=True)
+        runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return {
+        "import": statistics.median(run["import"] for run in runs),
+        "first_render": statistics.median(run["first_render"] for run in runs),
+        "eager_modules": sorted({name for run in runs for name in run["eager_modules"]}),
+        "errors": [error for run in runs for error in run["errors"]],
+    }
+
+
+def check_startup(result, budget=STARTUP_BUDGET):
+    """Return the reasons `result` (from startup()) breaks the startup budget"""
+    problems = [f"importing the app loaded {name}" for name in result["eager_modules"]]
+    problems += [f"first render raised {error}" for error in result["errors"][:1]]
+    total = result["import"] + result["first_render"]
+    if total > budget:
+        problems.append(f"import + first render took {total:.2f}s, budget is {budget:.2f}s")
+    return problems
+
+
+def run_benchmarks(repeat=5, article_words=ARTICLE_WORDS, batch_sizes=BATCH_SIZES, log=print):
+    from model_registry import ModelRegistry
+
+    results = {}
+    app = startup(max(1, repeat // 2))
+    results["startup.import"] = app["import"]
+    results["startup.first_render"] = app["first_render"]
+    log(f"startup: import {app['import']:.3f}s, first render {app['first_render']:.3f}s")
+
+    keys = [key for key in paths if key.endswith(("_model", "_vectorizer"))]
+    registry = ModelRegistry()
+    keys = [key for key in keys if registry.available(key)]
+
+    for key in keys:
+        results[f"load.cold.{key}"] = statistics.median(cold_load(key) for _ in range(max(1, repeat // 2)))
+        registry.get(key)
+        results[f"load.warm.{key}"] = timed(lambda: registry.get(key), repeat)
+        log(f"load {key}: cold {results[f'load.cold.{key}']:.3f}s")
+
+    vectorizer = registry.vectorizer()
+    model_keys = [key for key in keys if key.endswith("_model")]
+
+    # Single articles of growing length
+    for n_words in article_words:
+        text = synthetic_articles(vectorizer, 1, n_words, seed=n_words)
+        results[f"transform.words_{n_words}"] = timed(lambda: vectorizer.transform(text), repeat)
+        vect_text = vectorizer.transform(text)
+        for key in model_keys:
+            model = registry.get(key)
+            results[f"predict.{key}.words_{n_words}"] = timed(lambda: model.predict(vect_text), repeat)
+            results[f"end_to_end.{key}.words_{n_words}"] = timed(
+                lambda: model.predict(vectorizer.transform(text)), repeat)
+        log(f"{n_words}-word article: transform {results[f'transform.words_{n_words}'] * 1000:.2f} ms")
+
+    # Batches of 100-word articles
+    pool = synthetic_articles(vectorizer, max(batch_sizes), 100, seed=1)
+    for batch in batch_sizes:
+        texts = pool[:batch]
+        runs = repeat if batch < 1000 else max(1, repeat // 2)
+        results[f"transform.batch_{batch}"] = timed(lambda: vectorizer.transform(texts), runs)
+        vect_text = vectorizer.transform(texts)
+        for key in model_keys:
+            model = registry.get(key)
+            results[f"predict.{key}.batch_{batch}"] = timed(lambda: model.predict(vect_text), runs)
+        log(f"batch {batch}: transform {results[f'transform.batch_{batch}'] * 1000:.2f} ms")
+
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+            "formats": {key: info["format"] for key, info in registry.stats().items()},
+        },
+        "results": results,
+    }
+
+
+def compare(report, baseline, tolerance=0.25, min_delta=0.001):
+    """Return a list of (metric, baseline, current) for metrics that got slower"""
+    regressions = []
+    for metric, old in baseline["results"].items():
+        new = report["results"].get(metric)
+        if new is None:
+            continue
+        if new > old * (1 + tolerance) and new - old > min_delta:
+            regressions.append((metric, old, new))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the news classifier")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--quick", action="store_true", help="Smaller article and batch sizes")
+    parser.add_argument("--out", help="Write the JSON report here (default: stdout)")
+    parser.add_argument("--baseline", help="Compare against this report and fail on regressions")
+    parser.add_argument("--save-baseline", help="Write the report as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--min-delta", type=float, default=0.001,
+                        help="Ignore differences smaller than this many seconds")
+    parser.add_argument("--startup-only", action="store_true",
+                        help="Only check app import and first-render time against the budget")
+    parser.add_argument("--startup-budget", type=float, default=STARTUP_BUDGET)
+    args = parser.parse_args()
+
+    log = lambda message: print(message, file=sys.stderr)
+    if args.startup_only:
+        result = startup(args.repeat)
+        log(f"import {result['import']:.3f}s, first render {result['first_render']:.3f}s")
+        problems = check_startup(result, args.startup_budget)
+        for problem in problems:
+            log(f"STARTUP {problem}")
+        sys.exit(1 if problems else 0)
+
+    article_words = ARTICLE_WORDS[:2] if args.quick else ARTICLE_WORDS
+    batch_sizes = BATCH_SIZES[:3] if args.quick else BATCH_SIZES
+    report = run_benchmarks(args.repeat, article_words, batch_sizes, log=log)
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+    elif not args.save_baseline:
+        print(text)
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    if args.baseline:
+        if not os.path.exists(args.baseline):
+            sys.exit(f"Baseline not found: {args.baseline}")
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance, args.min_delta)
+        for metric, old, new in regressions:
+            log(f"REGRESSION {metric}: {old * 1000:.2f} ms -> {new * 1000:.2f} ms ({new / old - 1:+.0%})")
+        if regressions:
+            sys.exit(1)
+        log(f"No regressions against {args.baseline}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+"""Top-k scores and a confidence cascade across the classifiers.
+
+Each stage's scores are softmax(logits / T), where the logits are the log of
+predict_proba (NB, LR, RF) or the SVC's one-vs-rest vote/margin scores, and
+T is a per-stage temperature. Fit the temperatures on labelled articles with
+
+    python cascade.py calibrate Train.csv --label-column category
+
+so that a score of 0.8 means roughly 80% accuracy for every stage and one
+confidence threshold can be applied to all of them. Without a calibration
+file (or for a model whose files changed since it was fitted) T is 1: the
+probability models keep their own predict_proba, and the SVC's softmaxed
+votes rarely exceed ~0.7, so the cascade seldom stops at that stage.
+"""
+import argparse
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from config import cascade_calibration, models
+from linear_engine import softmax
+
+# Cheapest first: NB and LR are a single 5-column matmul, the SVC needs 10
+# pairwise columns plus voting, and Random Forest walks every tree
+DEFAULT_STAGES = ["nb_model", "lr_model", "svm_model", "rf_model"]
+
+MODEL_NAMES = {key: name for name, key in models.items()}
+
+# Candidate temperatures searched when calibrating
+TEMPERATURES = np.exp(np.linspace(np.log(0.02), np.log(50.0), 400))
+
+
+def stage_logits(model, vect_text):
+    """Per-class logits: log predict_proba where the model has it, else one-vs-rest decision scores"""
+    if hasattr(model, "predict_proba") and getattr(model, "probability", True):
+        return np.log(np.clip(np.asarray(model.predict_proba(vect_text), dtype=np.float64), 1e-12, None))
+    if hasattr(model, "ovr_decision_function"):
+        return model.ovr_decision_function(vect_text)
+    return np.asarray(model.decision_function(vect_text), dtype=np.float64)
+
+
+def class_scores(model, vect_text, temperature=1.0):
+    """Per-class scores in [0, 1] that sum to one for each row, softmax(logits / temperature)"""
+    return softmax(stage_logits(model, vect_text) / temperature)
+
+
+def top_k(model, vect_text, k=3, temperature=1.0):
+    """Return, for each row, the k most likely (label, score) pairs"""
+    scores = class_scores(model, vect_text, temperature)
+    order = np.argsort(-scores, axis=1)[:, :k]
+    return [[(str(model.classes_[j]), float(row[j])) for j in idx] for row, idx in zip(scores, order)]
+
+
+def fit_temperature(logits, labels):
+    """Temperature minimising the negative log-likelihood of the true class indices `labels`"""
+    best, best_nll = 1.0, np.inf
+    rows = np.arange(len(labels))
+    for temperature in TEMPERATURES:
+        scaled = logits / temperature
+        scaled -= scaled.max(axis=1, keepdims=True)
+        nll = np.mean(np.log(np.exp(scaled).sum(axis=1)) - scaled[rows, labels])
+        if nll < best_nll:
+            best, best_nll = float(temperature), nll
+    return best
+
+
+def calibrate(registry, texts, labels, stages=None):
+    """Fit each stage's temperature on labelled texts; returns {key: {"temperature", "fingerprint", ...}}"""
+    vect_text = registry.vectorizer().transform(texts)
+    labels = np.asarray(labels).astype(str)
+    calibration = {}
+    for key in stages or DEFAULT_STAGES:
+        if not registry.available(key):
+            continue
+        model = registry.get(key)
+        classes = [str(c) for c in model.classes_]
+        known = np.isin(labels, classes)
+        logits = stage_logits(model, vect_text[np.flatnonzero(known)])
+        index = {label: i for i, label in enumerate(classes)}
+        targets = np.array([index[label] for label in labels[known]], dtype=np.int64)
+        temperature = fit_temperature(logits, targets)
+        scores = softmax(logits / temperature)
+        calibration[key] = {
+            "temperature": temperature,
+            "fingerprint": registry.fingerprint(key),
+            "articles": int(known.sum()),
+            "accuracy": float(np.mean(scores.argmax(axis=1) == targets)),
+            "mean_confidence": float(scores.max(axis=1).mean()),
+        }
+    return calibration
+
+
+def write_calibration(calibration, path=None):
+    path = path or cascade_calibration
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(calibration, f, indent=2)
+    os.replace(tmp_path, path)
+    return path
+
+
+_loaded = {}
+_loaded_lock = threading.Lock()
+
+
+def load_calibration(path=None):
+    """Return the calibration file's contents ({} if it has not been fitted), re-read when it changes"""
+    path = path or cascade_calibration
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return {}
+    cached = _loaded.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    with open(path, encoding="utf-8") as f:
+        calibration = json.load(f)
+    with _loaded_lock:
+        _loaded[path] = (mtime, calibration)
+    return calibration
+
+
+def cascade_predict(registry, text, threshold=0.8, stages=None, k=3, calibration=None):
+    """Try the cheapest model first and escalate only while confidence is below `threshold`.
+
+    The article is vectorised once and the same row is passed to every stage.
+    The last available stage always answers. Returns a dict with the label,
+    its score, the answering stage, its top-k and one entry per stage tried.
+    """
+    vect_text = registry.vectorizer().transform([text])
+    stages = [key for key in (stages or DEFAULT_STAGES) if registry.available(key)]
+    if not stages:
+        raise FileNotFoundError("No model files available for the cascade")
+    calibration = load_calibration() if calibration is None else calibration
+
+    attempts = []
+    for position, key in enumerate(stages):
+        model = registry.get(key)
+        # A temperature fitted on other model files does not apply to this one
+        entry = calibration.get(key)
+        calibrated = entry is not None and entry.get("fingerprint") == registry.fingerprint(key)
+        temperature = entry["temperature"] if calibrated else 1.0
+        start = time.perf_counter()
+        ranked = top_k(model, vect_text, k, temperature)[0]
+        label, confidence = ranked[0]
+        attempts.append({"stage": MODEL_NAMES.get(key, key), "label": label, "confidence": confidence,
+                         "calibrated": calibrated, "seconds": time.perf_counter() - start})
+        if confidence >= threshold or position == len(stages) - 1:
+            return {"label": label, "confidence": confidence, "stage": MODEL_NAMES.get(key, key),
+                    "stage_index": position + 1, "top_k": ranked, "attempts": attempts}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fit the cascade's per-stage temperatures on labelled articles")
+    parser.add_argument("command", choices=["calibrate"])
+    parser.add_argument("corpus", help="CSV or JSONL file with article text and a category column")
+    parser.add_argument("--label-column", default="category")
+    parser.add_argument("--text-column", default=None)
+    parser.add_argument("--max-articles", type=int, default=20000)
+    parser.add_argument("--out", default=cascade_calibration)
+    args = parser.parse_args()
+
+    import pandas as pd
+
+    from batch_classify import read_articles, resolve_text_column
+    from model_registry import get_registry
+
+    frames, n_rows = [], 0
+    for chunk in read_articles(args.corpus, chunk_size=5000):
+        frames.append(chunk)
+        n_rows += len(chunk)
+        if n_rows >= args.max_articles:
+            break
+    corpus = pd.concat(frames).head(args.max_articles)
+    column = resolve_text_column(corpus.columns, args.text_column)
+    calibration = calibrate(get_registry(), corpus[column].fillna("").astype(str).tolist(),
+                            corpus[args.label_column].tolist())
+    path = write_calibration(calibration, args.out)
+    for key, entry in calibration.items():
+        print(f"{key}: T={entry['temperature']:.3f}, accuracy {entry['accuracy']:.3f}, "
+              f"mean confidence {entry['mean_confidence']:.3f} on {entry['articles']} articles")
+    print(f"Wrote {path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+import os
+
+# Define paths to models and other resources
+base_dir = os.path.dirname(os.path.abspath(__file__))
+
+paths = {
+    "svm_model": os.path.join(base_dir, 'svm_classifier_model.pkl'),
+    "tfidf_vectorizer": os.path.join(base_dir, 'tfidf_vectorizer.pkl'),
+    "lr_model": os.path.join(base_dir, 'lr_classifier_model.pkl'),
+    "nb_model": os.path.join(base_dir, 'nb_classifier_model.pkl'),
+    "rf_model": os.path.join(base_dir, 'rf_classifier_model.pkl'),
+    # Published by online_learning.py; only served from a version in model_versions/ that includes it
+    "online_model": os.path.join(base_dir, 'online_sgd_model.pkl'),
+    "announcement_image": os.path.join(base_dir, 'announcement-article-articles-copy-coverage.jpg'),
+    "class_dist": os.path.join(base_dir, 'imbalanced_distribution.png'),
+    "balanced_class_dist": os.path.join(base_dir, 'balanced_class_category.png'),
+    "new_word_cloud": os.path.join(base_dir, 'wordcloud_by_category.png'),
+    "logo_image": os.path.join(base_dir, 'Logo1.jpg'),
+    # Corpus aggregates for the EDA page, written by `python eda_stats.py <corpus>`
+    "eda_stats": os.path.join(base_dir, 'eda_stats.parquet'),
+}
+
+# Compact, memory-mappable export of the models written by `python artifacts.py export`.
+# Used in place of the pickles above whenever it exists.
+artifact_dir = os.path.join(base_dir, 'artifacts')
+
+# Serve the LR, NB and linear SVC pickles through the NumPy engine in linear_engine.py
+linear_engine = True
+
+# Display name of each classifier mapped to its key in `paths`
+models = {
+    "Multinomial Naive Bayes": "nb_model",
+    "Random Forest": "rf_model",
+    "Logistic Regression": "lr_model",
+    "Support Vector Machine (SVM)": "svm_model",
+    "Online Logistic Regression (SGD)": "online_model",
+}
+
+# Prediction cache limits; set "path" (e.g. os.path.join(base_dir, '.cache', 'predictions.json'))
+# to keep cached predictions across restarts
+cache_settings = {
+    "maxsize": 10000,
+    "ttl": 24 * 3600,
+    "path": None,
+}
+
+# Feedback is queued in memory and written to this SQLite file in batches
+feedback_settings = {
+    "path": os.path.join(base_dir, 'feedback.sqlite3'),
+    "batch_size": 100,
+    "flush_interval": 1.0,
+}
+
+# Per-stage temperatures of the confidence cascade, fitted by `python cascade.py calibrate <corpus>`
+cascade_calibration = os.path.join(base_dir, 'cascade_calibration.json')
+
+# Versioned model directory managed by model_store.py. Each version is a sub-directory
+# with its own manifest.json; the file CURRENT names the one being served. Without any
+# versions the files in `paths` above are served.
+model_store_dir = os.path.join(base_dir, 'model_versions')
+
+# Seconds between checks of CURRENT for a newly activated version
+model_watch_interval = 5.0
+
+# Published versions kept on disk besides the active one; older ones are deleted after each publish
+model_retention = 10
+
+# Prometheus text dump of the app's timings and counters, rewritten every `interval` seconds
+metrics_settings = {
+    "path": os.path.join(base_dir, 'metrics.prom'),
+    "interval": 15.0,
+}
+
+# Textfile written by service.py, kept apart from the app's so neither overwrites the other
+service_metrics_path = os.path.join(base_dir, 'service_metrics.prom')
+
+# online_learning.py: corrected labels from the Feedback page are applied in mini-batches
+# of `batch_size`, and the model is published as a new version after `snapshot_every`
+# corrections or `snapshot_interval` seconds, whichever comes first
+online_learning = {
+    "batch_size": 32,
+    "learning_rate": 0.05,
+    "snapshot_every": 500,
+    "snapshot_interval": 1800.0,
+    "poll_interval": 10.0,
+}
+
+# Near-duplicate index in front of the classifiers (near_duplicates.py): articles whose
+# estimated word 3-gram Jaccard similarity to an indexed one reaches `threshold` reuse its label
+near_duplicate_settings = {
+    "threshold": 0.8,
+    "num_perm": 64,
+    "bands": 8,
+    "maxsize": 100000,
+    "path": os.path.join(base_dir, '.cache', 'near_duplicates.npz'),
+}
@@ -0,0 +1,146 @@
+"""Precomputed aggregates of the labelled corpus for the EDA page.
+
+    python eda_stats.py Train.csv --label-column category
+
+scans the corpus once, in chunks, and writes a small Parquet file in long
+format, one row per (kind, category, key):
+
+    kind="count"    articles per category
+    kind="length"   articles per category and word-count bin (key = bin start)
+    kind="term"     the top-n terms of each category by occurrences (key = term)
+
+The EDA page draws its charts from this file, which is read once per process
+and again only when it changes.
+"""
+import argparse
+import os
+import re
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from batch_classify import detect_format, read_articles, resolve_text_column
+from config import paths
+
+# Lower edges of the article length bins, in words
+LENGTH_BINS = [0, 50, 100, 200, 300, 400, 500, 750, 1000, 1500, 2000, 5000]
+
+
+def build_stats(source, vectorizer, label_column="category", text_column=None, top_n=50,
+                chunk_size=5000, stop_words=None):
+    """Aggregate a labelled CSV/JSONL corpus into the long-format DataFrame described above"""
+    from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS, CountVectorizer
+
+    # Same tokens and vocabulary as the classifier, but raw counts instead of TF-IDF
+    counter = CountVectorizer(vocabulary=vectorizer.vocabulary_, lowercase=vectorizer.lowercase,
+                              token_pattern=vectorizer.token_pattern)
+    token = re.compile(vectorizer.token_pattern)
+    classes = []
+    codes_of = {}
+    counts = {}
+    lengths = {}
+    term_counts = None
+    for chunk in read_articles(source, detect_format(source), chunk_size):
+        column = resolve_text_column(chunk.columns, text_column)
+        texts = chunk[column].fillna("").astype(str).tolist()
+        labels = chunk[label_column].astype(str).tolist()
+        for label in labels:
+            if label not in codes_of:
+                codes_of[label] = len(classes)
+                classes.append(label)
+                counts[label] = 0
+                lengths[label] = np.zeros(len(LENGTH_BINS), dtype=np.int64)
+        codes = np.array([codes_of[label] for label in labels], dtype=np.int64)
+
+        n_words = np.array([len(token.findall(text)) for text in texts])
+        bins = np.searchsorted(LENGTH_BINS, n_words, side="right") - 1
+        for code, n in zip(*np.unique(codes, return_counts=True)):
+            counts[classes[code]] += int(n)
+            lengths[classes[code]] += np.bincount(bins[codes == code], minlength=len(LENGTH_BINS))
+
+        # One sparse product sums the term counts of every article per category
+        onehot = sp.csr_matrix((np.ones(len(texts)), (codes, np.arange(len(texts)))),
+                               shape=(len(classes), len(texts)))
+        chunk_terms = (onehot @ counter.transform(texts)).toarray()
+        if term_counts is None:
+            term_counts = chunk_terms
+        else:
+            # Categories first seen in this chunk get new rows
+            term_counts = np.vstack([term_counts, np.zeros((len(classes) - len(term_counts),
+                                                             term_counts.shape[1]))])
+            term_counts += chunk_terms
+
+    names = counter.get_feature_names_out()
+    stop_words = ENGLISH_STOP_WORDS if stop_words is None else stop_words
+    keep = np.array([name not in stop_words for name in names])
+    rows = []
+    for index, label in enumerate(classes):
+        rows.append(("count", label, "", counts[label]))
+        rows += [("length", label, str(edge), int(n)) for edge, n in zip(LENGTH_BINS, lengths[label])]
+        totals = np.where(keep, term_counts[index], 0)
+        for column in np.argsort(-totals, kind="stable")[:top_n]:
+            if totals[column] > 0:
+                rows.append(("term", label, str(names[column]), int(totals[column])))
+    return pd.DataFrame(rows, columns=["kind", "category", "key", "value"])
+
+
+def write_stats(stats, path=None):
+    path = path or paths["eda_stats"]
+    tmp_path = f"{path}.tmp"
+    stats.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+    return path
+
+
+_loaded = {}
+_loaded_lock = threading.Lock()
+
+
+def load_stats(path=None):
+    """Return {"counts", "lengths", "terms"} DataFrames, or None if the file has not been built"""
+    path = path or paths["eda_stats"]
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    cached = _loaded.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    stats = pd.read_parquet(path)
+    tables = {
+        "counts": stats[stats.kind == "count"][["category", "value"]].rename(columns={"value": "articles"}),
+        "lengths": stats[stats.kind == "length"].assign(words=lambda df: df.key.astype(int))[
+            ["category", "words", "value"]].rename(columns={"value": "articles"}),
+        "terms": stats[stats.kind == "term"][["category", "key", "value"]].rename(
+            columns={"key": "term", "value": "occurrences"}),
+    }
+    with _loaded_lock:
+        _loaded[path] = (mtime, tables)
+    return tables
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute the EDA page's aggregates from a labelled corpus")
+    parser.add_argument("corpus", help="CSV or JSONL file with article text and a category column")
+    parser.add_argument("--label-column", default="category")
+    parser.add_argument("--text-column", default=None)
+    parser.add_argument("--top-n", type=int, default=50, help="Terms kept per category")
+    parser.add_argument("--out", default=paths["eda_stats"])
+    args = parser.parse_args()
+
+    from model_registry import ModelRegistry
+
+    start = time.perf_counter()
+    # The pickled TfidfVectorizer: the compact export has no vocabulary to count with
+    vectorizer = ModelRegistry(artifact_dir=None).vectorizer()
+    stats = build_stats(args.corpus, vectorizer, args.label_column, args.text_column, args.top_n)
+    path = write_stats(stats, args.out)
+    print(f"Wrote {len(stats)} rows to {path} ({os.path.getsize(path) / 1024:.0f} KB) "
+          f"in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from config import models
+
+# Shared by every session; scikit-learn releases the GIL in much of predict
+_executor = ThreadPoolExecutor(max_workers=len(models), thread_name_prefix="ensemble")
+
+
+def _run_model(name, model, vect_text):
+    start = time.perf_counter()
+    label = model.predict(vect_text)[0]
+    proba = None
+    if hasattr(model, "predict_proba") and getattr(model, "probability", True):
+        proba = dict(zip(model.classes_, model.predict_proba(vect_text)[0]))
+    return {
+        "model": name,
+        "label": str(label),
+        "proba": proba,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def ensemble_vote(results):
+    """Combine per-model results into a majority label and a probability-weighted label.
+
+    Models without `predict_proba` (e.g. SVC trained without probability=True)
+    contribute a one-hot vote to the weighted score.
+    """
+    if not results:
+        return {"majority": None, "weighted": None, "scores": {}}
+    votes = Counter(r["label"] for r in results)
+    # Ties go to the model listed first, which keeps the vote deterministic
+    order = {r["label"]: i for i, r in reversed(list(enumerate(results)))}
+    majority = max(votes, key=lambda label: (votes[label], -order[label]))
+
+    scores = Counter()
+    for r in results:
+        if r["proba"] is not None:
+            for label, p in r["proba"].items():
+                scores[str(label)] += float(p)
+        else:
+            scores[r["label"]] += 1.0
+    total = sum(scores.values())
+    scores = {label: score / total for label, score in scores.most_common()}
+    return {"majority": majority, "weighted": next(iter(scores)), "scores": scores}
+
+
+def compare_models(registry, text, names=None):
+    """Vectorise `text` once and evaluate every available model on a thread pool.
+
+    Returns (results, ensemble, skipped) where `results` holds each model's
+    label, class probabilities (if any) and wall-clock predict time, and
+    `skipped` lists models whose pickle is missing.
+    """
+    names = list(names or registry.model_names())
+    vect_text = registry.vectorizer().transform([text])
+
+    loaded, skipped = [], []
+    for name in names:
+        if registry.available(models[name]):
+            loaded.append((name, registry.get(models[name])))
+        else:
+            skipped.append(name)
+
+    futures = [_executor.submit(_run_model, name, model, vect_text) for name, model in loaded]
+    results = [future.result() for future in futures]
+    return results, ensemble_vote(results), skipped
@@ -0,0 +1,87 @@
+"""Per-term explanations of linear predictions.
+
+For LR, Multinomial NB and the linear SVC the score of a class is a sum over
+the article's non-zero TF-IDF columns of value × weight, plus a bias. The
+reason an article was labelled A rather than the runner-up B is therefore
+the per-term difference value × (weight_A − weight_B); for the one-vs-one
+SVC it is the term's share of the A-versus-B pairwise decision. Only the
+article's non-zero columns are touched, so an explanation costs about as
+much as the prediction itself.
+"""
+import weakref
+
+import numpy as np
+
+from linear_engine import LinearModel, is_linear
+
+_terms = weakref.WeakKeyDictionary()
+
+
+def term_names(vectorizer, columns):
+    """Vocabulary terms of `columns` for a TfidfVectorizer or an artifacts.CompactVectorizer"""
+    if hasattr(vectorizer, "term"):
+        return [vectorizer.term(column) for column in columns]
+    names = _terms.get(vectorizer)
+    if names is None:
+        # Built once per vectorizer; get_feature_names_out sorts the whole vocabulary
+        names = _terms[vectorizer] = vectorizer.get_feature_names_out()
+    return [str(names[column]) for column in columns]
+
+
+def explain(model, vectorizer, vect_row, k=10, label=None):
+    """Explain the label of one TF-IDF row; returns None for non-linear models.
+
+    `label` is the label being shown, by default the model's own prediction.
+    The result holds that `label`, the strongest other class it is compared
+    with (`versus`), the model's own `predicted` label, and the `k` terms
+    pushing most towards each (`terms_for`, `terms_against`) as
+    (term, contribution, tfidf) triples. Returns None if `label` is not one
+    of the model's classes.
+    """
+    if not isinstance(model, LinearModel):
+        if not is_linear(model):
+            return None
+        model = LinearModel.from_estimator(model)
+
+    row = vect_row.tocsr()[0]
+    columns, values = row.indices, row.data
+    weights = np.asarray(model.weights[columns], dtype=np.float64)
+    scores = model.scores_from_decision((values @ weights + model.bias)[np.newaxis, :])[0]
+    order = np.argsort(-scores, kind="stable")
+    predicted = order[0]
+    if label is None:
+        label = predicted
+    else:
+        matches = np.flatnonzero(model.classes_.astype(str) == str(label))
+        if not len(matches):
+            return None
+        label = int(matches[0])
+    versus = next(int(j) for j in order if j != label)
+
+    if model.kind == "svc_ovo":
+        # The A-versus-B classifier's column; positive values favour the first class of the pair
+        pair = int(np.flatnonzero((model.pairs == (min(label, versus), max(label, versus))).all(axis=1))[0])
+        sign = 1.0 if label < versus else -1.0
+        contrast = sign * weights[:, pair]
+        bias = sign * model.bias[pair]
+    else:
+        contrast = weights[:, label] - weights[:, versus]
+        bias = model.bias[label] - model.bias[versus]
+    contributions = values * contrast
+
+    ranked = np.argsort(-contributions, kind="stable")
+    top = [j for j in ranked[:k] if contributions[j] > 0]
+    bottom = [j for j in ranked[::-1][:k] if contributions[j] < 0]
+    terms_for = [(name, float(contributions[j]), float(values[j]))
+                 for name, j in zip(term_names(vectorizer, columns[top]), top)]
+    terms_against = [(name, float(contributions[j]), float(values[j]))
+                     for name, j in zip(term_names(vectorizer, columns[bottom]), bottom)]
+    return {
+        "label": str(model.classes_[label]),
+        "versus": str(model.classes_[versus]),
+        "predicted": str(model.classes_[predicted]),
+        "margin": float(contributions.sum() + bias),
+        "bias": float(bias),
+        "terms_for": terms_for,
+        "terms_against": terms_against,
+    }
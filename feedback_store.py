@@ -0,0 +1,206 @@
+import atexit
+import json
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+
+from config import feedback_settings
+from metrics import get_metrics
+
+_STOP = object()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS feedback (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL NOT NULL,
+    kind TEXT NOT NULL,
+    message TEXT,
+    article_text TEXT,
+    prediction TEXT,
+    model TEXT,
+    data TEXT
+)
+"""
+
+COLUMNS = ("created_at", "kind", "message", "article_text", "prediction", "model", "data")
+
+
+class FeedbackSink:
+    """Non-blocking, batched writer of feedback records to an append-only SQLite table.
+
+    `submit` only puts the record on an in-memory queue; a background thread
+    drains it and inserts whole batches in one transaction, so a user's rerun
+    never waits on disk I/O. If the queue is full the record is dropped and
+    counted rather than blocking the caller.
+
+    A locked or unavailable database is waited on for `busy_timeout` seconds
+    and a failed batch is retried `retries` times with exponential backoff
+    before it is dropped. Failures are counted, printed to stderr and exported
+    as metrics, including whether the writer thread is still running.
+    """
+
+    def __init__(self, path, batch_size=100, flush_interval=1.0, max_queue=10000, busy_timeout=5.0,
+                 retries=3, backoff=0.5):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.busy_timeout = busy_timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.errors = 0
+        self.retried = 0
+        self.last_error = None
+        self._connection = None
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, name="feedback-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, kind="feedback", message=None, article_text=None, prediction=None,
+               model=None, **data):
+        """Queue a record; returns False if it had to be dropped"""
+        if not self._thread.is_alive():
+            # Nothing would ever drain the queue
+            self.dropped += 1
+            return False
+        record = (time.time(), kind, message, article_text, prediction, model,
+                  json.dumps(data) if data else None)
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            return False
+        return True
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=self.busy_timeout)
+        connection.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout * 1000)}")
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(SCHEMA)
+        connection.commit()
+        return connection
+
+    def _fail(self, error, what):
+        self.errors += 1
+        self.last_error = f"{what}: {error}"
+        print(f"feedback-writer: {self.last_error}", file=sys.stderr)
+
+    def _write(self, batch):
+        """Insert `batch` in one transaction, reconnecting and retrying with backoff before dropping it"""
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self.retried += 1
+                time.sleep(self.backoff * 2 ** (attempt - 1))
+            try:
+                if self._connection is None:
+                    self._connection = self._connect()
+                with self._connection:
+                    self._connection.executemany(
+                        f"INSERT INTO feedback ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                        batch)
+            except (sqlite3.Error, OSError) as e:
+                self._fail(e, f"attempt {attempt + 1} of {self.retries + 1}")
+                if self._connection is not None:
+                    self._connection.close()
+                    self._connection = None
+                continue
+            self.written += len(batch)
+            self.batches += 1
+            return True
+        self.dropped += len(batch)
+        return False
+
+    def _run(self):
+        try:
+            self._drain()
+        except Exception as e:
+            self._fail(e, "writer thread stopped")
+            raise
+        finally:
+            if self._connection is not None:
+                self._connection.close()
+
+    def _drain(self):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        stopping = False
+        while not stopping:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                item = None
+            if item is _STOP:
+                stopping = True
+            elif item is not None:
+                batch.append(item)
+
+            if batch and (stopping or len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                self._write(batch)
+                batch = []
+            if time.monotonic() >= deadline:
+                deadline = time.monotonic() + self.flush_interval
+
+    def close(self, timeout=5.0):
+        """Flush everything queued so far and stop the writer thread"""
+        if self._thread.is_alive():
+            try:
+                self._queue.put(_STOP, timeout=timeout)
+            except queue.Full:
+                return
+            self._thread.join(timeout)
+
+    def stats(self):
+        return {"queued": self._queue.qsize(), "written": self.written, "batches": self.batches,
+                "dropped": self.dropped, "errors": self.errors, "retries": self.retried,
+                "writer_alive": int(self._thread.is_alive()), "last_error": self.last_error}
+
+
+def read_feedback(path=None, kind=None, limit=100, after_id=None):
+    """Return the most recent stored records as dicts, newest first.
+
+    With `after_id`, return instead the oldest records whose id is greater,
+    oldest first, so a consumer can page through new records in order.
+    """
+    path = path or feedback_settings["path"]
+    if not os.path.exists(path):
+        return []
+    connection = sqlite3.connect(path)
+    connection.row_factory = sqlite3.Row
+    try:
+        query = "SELECT * FROM feedback"
+        conditions, params = [], []
+        if kind:
+            conditions.append("kind = ?")
+            params.append(kind)
+        if after_id is not None:
+            conditions.append("id > ?")
+            params.append(after_id)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY id ASC LIMIT ?" if after_id is not None else " ORDER BY id DESC LIMIT ?"
+        params.append(limit)
+        return [dict(row) for row in connection.execute(query, params)]
+    finally:
+        connection.close()
+
+
+_sink = None
+_sink_lock = threading.Lock()
+
+
+def get_feedback_sink():
+    """Return the feedback writer shared by every session in this process"""
+    global _sink
+    if _sink is None:
+        with _sink_lock:
+            if _sink is None:
+                _sink = FeedbackSink(**feedback_settings)
+                get_metrics().register_collector("feedback", _sink.stats)
+    return _sink
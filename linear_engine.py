@@ -0,0 +1,195 @@
+"""Pure-NumPy inference for the linear classifiers (LR, Multinomial NB, linear SVCs, SGD).
+
+Every shipped model except Random Forest scores a TF-IDF row linearly, so
+prediction reduces to one sparse-dense product plus an argmax (or, for the
+one-vs-one SVC, a vote over pairwise decisions). `LinearModel` keeps only
+those arrays, so no scikit-learn estimator code runs on the hot path.
+
+Probabilities use the estimator's own link: a softmax for multinomial
+logistic regression and Naive Bayes, and per-class sigmoids normalised to
+sum to one for one-vs-rest models (binary or liblinear LR, SGDClassifier
+with log loss). Margin classifiers (LinearSVC, SGDClassifier with hinge and
+other non-log losses) have no probability link and serve labels and
+decision scores only. Any other estimator is not linear here and is served
+by scikit-learn.
+
+Label and probability parity with the original estimators, including
+binary, SGD and margin models, is tested in tests/test_linear_engine.py; check the
+labels of the pickled models on more samples with:
+
+    python linear_engine.py --samples 2000
+"""
+import argparse
+import random
+import sys
+from itertools import combinations
+
+import numpy as np
+import scipy.sparse as sp
+
+LINEAR_MODEL_KEYS = ["lr_model", "nb_model", "svm_model"]
+
+
+def softmax(scores):
+    """Row-wise softmax of a 2-D score array, shifted by each row's max for stability"""
+    scores = scores - scores.max(axis=1, keepdims=True)
+    np.exp(scores, out=scores)
+    scores /= scores.sum(axis=1, keepdims=True)
+    return scores
+
+
+def _sigmoid_normalised(scores):
+    np.negative(scores, out=scores)
+    np.exp(scores, out=scores)
+    scores += 1
+    np.reciprocal(scores, out=scores)
+    scores /= scores.sum(axis=1, keepdims=True)
+    return scores
+
+
+def _logistic_ovr(model):
+    """Whether a LogisticRegression predicts one-vs-rest, following scikit-learn's rule"""
+    multi_class = getattr(model, "multi_class", "auto")
+    if multi_class == "ovr":
+        return True
+    return multi_class in ("auto", "deprecated", "warn") and (
+        len(model.classes_) <= 2 or getattr(model, "solver", "lbfgs") == "liblinear")
+
+
+def linear_parts(model):
+    """Return (kind, weights, bias) for a fitted LR, MultinomialNB, linear SVC, LinearSVC or SGDClassifier"""
+    name = type(model).__name__
+    if name == "MultinomialNB":
+        # Joint log-likelihood is X @ feature_log_prob_.T + class_log_prior_
+        return "naive_bayes", model.feature_log_prob_, model.class_log_prior_
+    if name == "SVC":
+        if model.kernel != "linear":
+            raise ValueError("Only linear-kernel SVC models have a linear form")
+        coef = model.coef_.toarray() if sp.issparse(model.coef_) else model.coef_
+        return "svc_ovo", coef, model.intercept_
+    if name == "LogisticRegression":
+        return "logistic_ovr" if _logistic_ovr(model) else "logistic", model.coef_, model.intercept_
+    if name == "SGDClassifier" and model.loss in ("log_loss", "log"):
+        return "logistic_ovr", model.coef_, model.intercept_
+    if name in ("LinearSVC", "SGDClassifier"):
+        # One-vs-rest margins: argmax gives the label, but there is no probability link
+        return "margin_ovr", model.coef_, model.intercept_
+    raise ValueError(f"Model of type {name} is not linear")
+
+
+def is_linear(model):
+    try:
+        linear_parts(model)
+    except (ValueError, AttributeError):
+        return False
+    return True
+
+
+class LinearModel:
+    """Score sparse TF-IDF rows with a (n_features, n_outputs) weight matrix.
+
+    Drop-in for the estimator's predict / predict_proba / decision_function.
+    """
+
+    def __init__(self, kind, weights, bias, classes):
+        self.kind = kind
+        self.weights = weights
+        self.bias = bias
+        self.classes_ = np.asarray(classes)
+        self.probability = kind not in ("svc_ovo", "margin_ovr")
+        if kind == "svc_ovo":
+            self.pairs = np.array(list(combinations(range(len(classes)), 2)))
+
+    @classmethod
+    def from_estimator(cls, model, dtype=np.float64):
+        kind, weights, bias = linear_parts(model)
+        weights, bias = np.asarray(weights), np.asarray(bias)
+        if kind != "svc_ovo" and len(model.classes_) == 2 and len(weights) == 1:
+            # A binary model has one decision d, positive for classes_[1]; scoring the
+            # classes -d and d keeps argmax and both probability links exact
+            weights, bias = np.vstack([-weights, weights]), np.concatenate([-bias, bias])
+        weights = np.ascontiguousarray(weights.T, dtype=dtype)
+        return cls(kind, weights, np.asarray(bias, dtype=dtype), model.classes_)
+
+    def decision_function(self, X):
+        return np.asarray(X @ self.weights, dtype=np.float64) + self.bias
+
+    def class_scores(self, X):
+        """Per-class scores whose argmax is the predicted label"""
+        return self.scores_from_decision(self.decision_function(X))
+
+    def scores_from_decision(self, scores):
+        """Turn decision_function output into per-class scores (votes for the SVC)"""
+        if self.kind != "svc_ovo":
+            return scores
+        # One-vs-one voting as libsvm does it: a positive value is a win for the first class
+        votes = np.zeros((scores.shape[0], len(self.classes_)))
+        first_wins = scores > 0
+        for k, (i, j) in enumerate(self.pairs):
+            votes[:, i] += first_wins[:, k]
+            votes[:, j] += ~first_wins[:, k]
+        return votes
+
+    def ovr_decision_function(self, X):
+        """One score per class; for the SVC, votes plus a bounded pairwise-margin term as in scikit-learn"""
+        if self.kind != "svc_ovo":
+            return self.decision_function(X)
+        scores = self.decision_function(X)
+        votes = self.class_scores(X)
+        confidences = np.zeros_like(votes)
+        for k, (i, j) in enumerate(self.pairs):
+            confidences[:, i] += scores[:, k]
+            confidences[:, j] -= scores[:, k]
+        return votes + confidences / (3 * (np.abs(confidences) + 1))
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.class_scores(X), axis=1)]
+
+    def predict_proba(self, X):
+        if not self.probability:
+            raise AttributeError(f"predict_proba is not available for {self.kind} models")
+        if self.kind == "logistic_ovr":
+            return _sigmoid_normalised(self.decision_function(X))
+        return softmax(self.decision_function(X))
+
+
+def check_parity(estimator, vectorizer, texts):
+    """Return the indices of `texts` where LinearModel and `estimator` disagree"""
+    vect_text = vectorizer.transform(texts)
+    expected = estimator.predict(vect_text)
+    actual = LinearModel.from_estimator(estimator).predict(vect_text)
+    return np.flatnonzero(expected != actual)
+
+
+def synthetic_texts(vectorizer, n, max_words=500, seed=0):
+    """Random articles drawn from the vocabulary plus some out-of-vocabulary noise"""
+    rng = random.Random(seed)
+    words = sorted(vectorizer.vocabulary_) + ["zzunknownzz", "The", "A"]
+    return [" ".join(rng.choices(words, k=rng.randint(0, max_words))) for _ in range(n)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check LinearModel labels against the pickled estimators")
+    parser.add_argument("--samples", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    from model_registry import ModelRegistry
+
+    registry = ModelRegistry(artifact_dir=None, linear_engine=False)
+    vectorizer = registry.vectorizer()
+    texts = synthetic_texts(vectorizer, args.samples, seed=args.seed)
+
+    failed = False
+    for key in LINEAR_MODEL_KEYS:
+        if not registry.available(key):
+            print(f"{key}: skipped (no model file)")
+            continue
+        mismatches = check_parity(registry.get(key), vectorizer, texts)
+        failed |= len(mismatches) > 0
+        print(f"{key}: {len(texts) - len(mismatches)}/{len(texts)} labels identical")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
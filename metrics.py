@@ -0,0 +1,191 @@
+"""Lightweight timings and counters for the app's hot path.
+
+    from metrics import get_metrics
+
+    with get_metrics().timer("predict"):
+        label = model.predict(vect_text)
+
+Each stage gets a fixed-bucket histogram, so recording a timing is a few
+additions under a lock and memory does not grow with traffic. Caches and
+other process-wide singletons register a collector whose numeric stats are
+exported as gauges. Everything is rendered in the Prometheus text format
+and shown on the app's hidden admin page (open the app with `?admin=1`).
+The app and service.py also write it to a textfile periodically, each to
+its own file; other processes using this module (CLIs, pool workers) only
+collect in memory.
+"""
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from config import metrics_settings
+
+PREFIX = "newsapp"
+
+# Upper bounds in seconds: 0.1 ms up to 30 s
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+           0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    """Count of observations per bucket, plus their total and number"""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th quantile (an estimate, not exact)"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets + (float("inf"),), self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+def process_memory_bytes():
+    """Resident set size of this process, or its peak where /proc is unavailable"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return 0
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class Metrics:
+    """Per-stage timing histograms, event counters and registered stats collectors"""
+
+    def __init__(self, path=None, interval=15.0):
+        self.path = path
+        self.interval = interval
+        self.started = time.time()
+        self._histograms = {}
+        self._counters = {}
+        self._collectors = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, stage):
+        """Record how long the body takes under `stage`, even if it raises"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def inc(self, event, n=1):
+        with self._lock:
+            self._counters[event] = self._counters.get(event, 0) + n
+
+    def register_collector(self, name, collect):
+        """Export the numeric values of the dict returned by `collect()` as `<name>_<key>` gauges"""
+        with self._lock:
+            self._collectors[name] = collect
+
+    def snapshot(self):
+        """Return (histograms, counters, gauges); histograms map stage -> summary dict"""
+        with self._lock:
+            histograms = {stage: {"count": h.count, "sum": h.sum, "counts": list(h.counts),
+                                  "p50": h.quantile(0.5), "p95": h.quantile(0.95), "p99": h.quantile(0.99)}
+                          for stage, h in self._histograms.items()}
+            counters = dict(self._counters)
+            collectors = dict(self._collectors)
+
+        gauges = {"process_resident_bytes": process_memory_bytes(),
+                  "process_uptime_seconds": time.time() - self.started}
+        for name, collect in collectors.items():
+            try:
+                values = collect()
+            except Exception:
+                continue
+            for key, value in values.items():
+                if isinstance(value, (int, float)):
+                    gauges[f"{name}_{key}"] = float(value)
+        return histograms, counters, gauges
+
+    def prometheus_text(self):
+        histograms, counters, gauges = self.snapshot()
+        lines = [f"# HELP {PREFIX}_stage_seconds Time spent in each stage of the app",
+                 f"# TYPE {PREFIX}_stage_seconds histogram"]
+        for stage, h in sorted(histograms.items()):
+            cumulative = 0
+            for bound, n in zip(BUCKETS + ("+Inf",), h["counts"]):
+                cumulative += n
+                lines.append(f'{PREFIX}_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lines.append(f'{PREFIX}_stage_seconds_sum{{stage="{stage}"}} {h["sum"]:.6f}')
+            lines.append(f'{PREFIX}_stage_seconds_count{{stage="{stage}"}} {h["count"]}')
+
+        lines += [f"# HELP {PREFIX}_events_total Events counted by the app",
+                  f"# TYPE {PREFIX}_events_total counter"]
+        lines += [f'{PREFIX}_events_total{{event="{event}"}} {n}' for event, n in sorted(counters.items())]
+
+        for name, value in sorted(gauges.items()):
+            lines += [f"# TYPE {PREFIX}_{name} gauge", f"{PREFIX}_{name} {value:g}"]
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path=None):
+        """Atomically write the Prometheus text dump, e.g. for node_exporter's textfile collector"""
+        path = path or self.path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Per process, so that a second writer never replaces a half-written file
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp, path)
+        return path
+
+    def start_writer(self, path=None):
+        """Rewrite the textfile every `interval` seconds; call only from a process entry point"""
+        self.path = path or self.path
+        if self.path and (self._thread is None or not self._thread.is_alive()):
+            self._thread = threading.Thread(target=self._write_loop, name="metrics-writer", daemon=True)
+            self._thread.start()
+
+    def _write_loop(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.write_textfile()
+            except OSError:
+                self.inc("metrics_write_errors")
+
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics():
+    """Return the metrics shared by everything running in this process"""
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                _metrics = Metrics(**metrics_settings)
+    return _metrics
@@ -0,0 +1,218 @@
+import hashlib
+import os
+import sys
+import threading
+import time
+
+from config import artifact_dir as default_artifact_dir
+from config import linear_engine as default_linear_engine
+from config import models
+from config import paths as default_paths
+from metrics import get_metrics
+
+
+def estimate_nbytes(obj, _seen=None):
+    """Rough resident size of a fitted estimator: arrays, sparse matrices and dicts"""
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+
+    if isinstance(getattr(obj, "nbytes", None), int):
+        return obj.nbytes
+    if hasattr(obj, "indptr") and hasattr(obj, "indices"):
+        return int(obj.data.nbytes + obj.indices.nbytes + obj.indptr.nbytes)
+    if isinstance(obj, dict):
+        size = sys.getsizeof(obj)
+        for key, value in obj.items():
+            size += estimate_nbytes(key, _seen) + estimate_nbytes(value, _seen)
+        return size
+    if isinstance(obj, (list, tuple)):
+        return sys.getsizeof(obj) + sum(estimate_nbytes(item, _seen) for item in obj)
+    if hasattr(obj, "__dict__"):
+        return sys.getsizeof(obj) + estimate_nbytes(vars(obj), _seen)
+    return sys.getsizeof(obj)
+
+
+class ModelRegistry:
+    """Process-wide store of the pickled models, each loaded lazily on first use.
+
+    Streamlit reruns the app script on every interaction but keeps imported
+    modules alive, so artifacts held here are deserialised once per process and
+    shared by every session. When `artifact_dir` holds an export made by
+    artifacts.py, the vectorizer and linear models are memory-mapped from it
+    instead of unpickled. With `linear_engine` on, pickled linear models are
+    served through linear_engine.LinearModel rather than scikit-learn.
+    """
+
+    def __init__(self, paths=None, artifact_dir=default_artifact_dir,
+                 linear_engine=default_linear_engine):
+        self.paths = dict(paths or default_paths)
+        self.artifact_dir = artifact_dir
+        self.linear_engine = linear_engine
+        # Set by model_store.ModelStore to the model version this registry serves
+        self.version = None
+        self._manifest = None
+        self._objects = {}
+        self._stats = {}
+        self._fingerprints = {}
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    def _lock_for(self, key):
+        with self._guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def manifest(self):
+        if self._manifest is None and self.artifact_dir:
+            from artifacts import read_manifest
+            self._manifest = read_manifest(self.artifact_dir) or {}
+        return self._manifest or {}
+
+    def _compact(self, key):
+        models = self.manifest().get("models", {})
+        return (key == "tfidf_vectorizer" and bool(models)) or key in models
+
+    def model_names(self):
+        """Display names, from config.models, of the models this registry has a file for"""
+        return [name for name, key in models.items() if key in self.paths]
+
+    def available(self, key):
+        return key in self._objects or self._compact(key) or os.path.exists(self.paths.get(key, ""))
+
+    def is_loaded(self, key):
+        return key in self._objects
+
+    def _files(self, key):
+        """The files `key` is loaded from"""
+        if self._compact(key):
+            prefixes = ("vocab_", "idf") if key == "tfidf_vectorizer" else (f"{key}.",)
+            return [os.path.join(self.artifact_dir, f) for f in sorted(os.listdir(self.artifact_dir))
+                    if f.startswith(prefixes)]
+        return [self.paths[key]]
+
+    def fingerprint(self, key):
+        """Short identity of the files behind `key` and the vectorizer.
+
+        Built from file names, sizes and modification times, so model versions that
+        hard-link or copy the same files share it; use it to key cached predictions.
+        """
+        try:
+            return self._fingerprints[key]
+        except KeyError:
+            pass
+        digest = hashlib.blake2b(digest_size=8)
+        for path in self._files(key) + self._files("tfidf_vectorizer"):
+            stat = os.stat(path)
+            digest.update(f"{os.path.basename(path)}:{stat.st_size}:{stat.st_mtime_ns};".encode("utf-8"))
+        self._fingerprints[key] = digest.hexdigest()
+        return self._fingerprints[key]
+
+    def get(self, key):
+        """Return the artifact stored under `key` in `paths`, loading it if needed"""
+        try:
+            return self._objects[key]
+        except KeyError:
+            pass
+
+        # One lock per artifact so that a slow SVM load does not block the vectorizer
+        with self._lock_for(key):
+            if key in self._objects:
+                return self._objects[key]
+            if self._compact(key):
+                obj, info = self._load_compact(key)
+            else:
+                obj, info = self._load_pickle(key)
+            self._stats[key] = info
+            self._objects[key] = obj
+            get_metrics().observe("model_load", info["load_seconds"])
+            return obj
+
+    def _load_pickle(self, key):
+        if key not in self.paths:
+            raise KeyError(f"Unknown resource: {key}")
+        path = self.paths[key]
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Model file not found: {path}")
+
+        # Imported here so that importing the registry stays cheap for pages without models
+        import joblib
+
+        start = time.perf_counter()
+        obj = joblib.load(path)
+        fmt = "pickle"
+        if self.linear_engine and key.endswith("_model"):
+            from linear_engine import LinearModel, is_linear
+            if is_linear(obj):
+                obj, fmt = LinearModel.from_estimator(obj), "pickle+linear"
+        return obj, {
+            "path": path,
+            "format": fmt,
+            "load_seconds": time.perf_counter() - start,
+            "file_bytes": os.path.getsize(path),
+            "memory_bytes": estimate_nbytes(obj),
+        }
+
+    def _load_compact(self, key):
+        from artifacts import load_model, load_vectorizer
+
+        start = time.perf_counter()
+        if key == "tfidf_vectorizer":
+            obj = load_vectorizer(self.artifact_dir, self.manifest())
+        else:
+            obj = load_model(self.artifact_dir, key, self.manifest())
+        return obj, {
+            "path": self.artifact_dir,
+            "format": "compact",
+            "load_seconds": time.perf_counter() - start,
+            "file_bytes": sum(os.path.getsize(path) for path in self._files(key)),
+            # Memory-mapped pages are shared with every other process using the export
+            "memory_bytes": estimate_nbytes(obj),
+        }
+
+    def vectorizer(self):
+        return self.get("tfidf_vectorizer")
+
+    def preload(self, keys=None):
+        """Eagerly load `keys` (every available model by default), e.g. at worker start"""
+        for key in keys or [k for k in self.paths if k.endswith(("_model", "_vectorizer"))]:
+            if self.available(key):
+                self.get(key)
+
+    def adopt(self, other):
+        """Share the objects `other` has loaded from the same files, e.g. ones hard-linked into a new version.
+
+        Returns the keys taken over; they are not loaded again.
+        """
+        adopted = []
+        for key in list(other._objects):
+            try:
+                same = self.available(key) and self.fingerprint(key) == other.fingerprint(key)
+            except (OSError, KeyError):
+                same = False
+            if same and key not in self._objects:
+                self._stats[key] = dict(other._stats[key])
+                self._objects[key] = other._objects[key]
+                adopted.append(key)
+        return adopted
+
+    def stats(self):
+        return {key: dict(value) for key, value in self._stats.items()}
+
+    def clear(self):
+        with self._guard:
+            self._objects.clear()
+            self._stats.clear()
+            self._fingerprints.clear()
+            self._manifest = None
+
+
+def get_registry():
+    """Return the registry of the model version currently served in this process.
+
+    Fetch it once per request: a newer version may be swapped in between calls.
+    """
+    from model_store import get_model_store
+
+    return get_model_store().registry()
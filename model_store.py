@@ -0,0 +1,407 @@
+"""Versioned model directory with hot swapping and rollback.
+
+    model_versions/
+        CURRENT                 name of the version being served, e.g. "v0003"
+        v0003/manifest.json     {"version", "created", "note", "files": {key: file name}}
+        v0003/svm_classifier_model.pkl
+        v0003/artifacts/        compact export of its linear models (see artifacts.py)
+
+Publish a retrained model and switch every running app and service to it with
+
+    python model_store.py publish --file svm_model=new_svm.pkl --note "retrained" --activate
+    python model_store.py rollback
+
+Each process runs a watcher thread that polls CURRENT. A newly named version
+is loaded and warmed on that thread while the old one keeps serving, and is
+then swapped in with a single reference assignment. Models whose files the
+new version shares with the served one (hard links) are reused, not
+reloaded. The previous version stays loaded, so rolling back is instant.
+
+Only the newest `config.model_retention` versions and the active one are
+kept on disk; `publish` deletes the others.
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import threading
+import time
+
+from config import artifact_dir as default_artifact_dir
+from config import model_retention, model_store_dir, model_watch_interval
+from config import paths as default_paths
+from metrics import get_metrics
+from model_registry import ModelRegistry
+
+BASELINE = "baseline"
+
+VERSION_NAME = re.compile(r"v\d+")
+
+# Models that only exist in published versions, never in the baseline files
+VERSIONED_KEYS = ("online_model",)
+
+# Short text used to run every model once before a version starts serving
+WARMUP_TEXT = "The government announced new funding for schools and hospitals"
+
+
+def _write_atomic(path, text):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _link_or_copy(source, target):
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+
+def _baseline_paths():
+    return {key: path for key, path in default_paths.items() if key not in VERSIONED_KEYS}
+
+
+class ModelStore:
+    """Serve one model version at a time and switch versions without blocking readers.
+
+    `registry()` always returns a complete ModelRegistry for a single version;
+    callers should fetch it once per request so that the vectorizer
+    and the model they use come from the same version.
+    """
+
+    def __init__(self, root=model_store_dir, interval=model_watch_interval, retention=model_retention):
+        self.root = root
+        self.interval = interval
+        self.retention = retention
+        self.swaps = 0
+        self.errors = 0
+        self.last_error = None
+        self._active = None
+        self._previous = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    # -- versions on disk -------------------------------------------------
+
+    def versions(self):
+        """Names of every published version, oldest first"""
+        if not os.path.isdir(self.root):
+            return []
+        # Skips the ".vNNNN.tmp" directory of a version still being published
+        return sorted(name for name in os.listdir(self.root)
+                      if VERSION_NAME.fullmatch(name)
+                      and os.path.exists(os.path.join(self.root, name, "manifest.json")))
+
+    def manifest(self, version):
+        with open(os.path.join(self.root, version, "manifest.json"), encoding="utf-8") as f:
+            return json.load(f)
+
+    def current_version(self):
+        """The version named in CURRENT, or BASELINE when nothing has been activated"""
+        try:
+            with open(os.path.join(self.root, "CURRENT"), encoding="utf-8") as f:
+                version = f.read().strip()
+        except FileNotFoundError:
+            return BASELINE
+        return version if version in self.versions() else BASELINE
+
+    def publish(self, files, note="", activate=False):
+        """Create a new version from `files` ({key: path}); returns its name.
+
+        Keys not given are carried over from the version currently named in
+        CURRENT (or from `config.paths`), hard-linked where possible, and the
+        linear models get a compact export in the version's artifacts/.
+        """
+        current = self.current_version()
+        if current == BASELINE:
+            inherited = {key: path for key, path in _baseline_paths().items()
+                         if key.endswith(("_model", "_vectorizer")) and os.path.exists(path)}
+        else:
+            inherited = self._version_paths(current)
+        sources = {**inherited, **files}
+        for key, path in files.items():
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"Model file not found: {path}")
+
+        existing = self.versions()
+        version = f"v{int(existing[-1][1:]) + 1 if existing else 1:04d}"
+        tmp_dir = os.path.join(self.root, f".{version}.tmp")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        names = {}
+        for key, source in sources.items():
+            names[key] = os.path.basename(default_paths.get(key, source))
+            _link_or_copy(source, os.path.join(tmp_dir, names[key]))
+        self._write_artifacts({key: os.path.join(tmp_dir, name) for key, name in names.items()},
+                              changed=set(files), current=current, out_dir=os.path.join(tmp_dir, "artifacts"))
+        manifest = {"version": version, "created": time.time(), "note": note, "files": names}
+        with open(os.path.join(tmp_dir, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        # A version becomes visible only once all of its files are in place
+        os.replace(tmp_dir, os.path.join(self.root, version))
+
+        if activate:
+            self.activate(version)
+        self.prune()
+        return version
+
+    def prune(self, keep=None):
+        """Delete all but the newest `keep` versions and the active one; returns the names deleted"""
+        keep = self.retention if keep is None else keep
+        versions = self.versions()
+        kept = set(versions[-keep:] if keep > 0 else []) | {self.current_version()}
+        removed = [version for version in versions if version not in kept]
+        for version in removed:
+            # Hide it first so no process starts loading a half-deleted version
+            trash = os.path.join(self.root, f".{version}.deleted")
+            os.replace(os.path.join(self.root, version), trash)
+            shutil.rmtree(trash, ignore_errors=True)
+        return removed
+
+    def activate(self, version):
+        """Name `version` in CURRENT; every watcher picks it up on its next poll"""
+        if version != BASELINE and version not in self.versions():
+            raise KeyError(f"Unknown model version: {version}")
+        os.makedirs(self.root, exist_ok=True)
+        if version == BASELINE:
+            try:
+                os.remove(os.path.join(self.root, "CURRENT"))
+            except FileNotFoundError:
+                pass
+        else:
+            _write_atomic(os.path.join(self.root, "CURRENT"), version + "\n")
+
+    def _artifact_dir(self, version):
+        return default_artifact_dir if version == BASELINE else os.path.join(self.root, version, "artifacts")
+
+    def _write_artifacts(self, paths, changed, current, out_dir):
+        """Export the linear models among `paths` to `out_dir`.
+
+        Files of models that are not in `changed` are hard-linked from the
+        current version's export when it has one, so publishing one retrained
+        model (or an online snapshot) only converts that model.
+        """
+        import joblib
+
+        from artifacts import export_artifacts, export_model, read_manifest, write_manifest
+        from linear_engine import LINEAR_MODEL_KEYS, is_linear
+
+        def linear_models(keys):
+            models = {}
+            for key in keys:
+                if key.endswith("_model") and key in paths:
+                    model = joblib.load(paths[key])
+                    if is_linear(model):
+                        models[key] = model
+            return models
+
+        previous_dir = self._artifact_dir(current)
+        previous = read_manifest(previous_dir) if previous_dir and "tfidf_vectorizer" not in changed else None
+        if previous is None:
+            if "tfidf_vectorizer" in paths:
+                try:
+                    export_artifacts(joblib.load(paths["tfidf_vectorizer"]), linear_models(paths), out_dir)
+                except ValueError:
+                    # A vectorizer the compact transform cannot reproduce; the version serves its pickles
+                    shutil.rmtree(out_dir, ignore_errors=True)
+            return
+
+        os.makedirs(out_dir)
+        kept = {key: entry for key, entry in previous["models"].items() if key in paths and key not in changed}
+        for name in os.listdir(previous_dir):
+            key = name.split(".", 1)[0]
+            if name != "manifest.json" and (key in kept or name.startswith(("vocab_", "idf"))):
+                _link_or_copy(os.path.join(previous_dir, name), os.path.join(out_dir, name))
+        previous["models"] = kept
+        missing = [key for key in LINEAR_MODEL_KEYS if key not in kept]
+        for key, model in linear_models(set(changed).union(missing)).items():
+            previous["models"][key] = export_model(model, key, out_dir)
+        write_manifest(previous, out_dir)
+
+    def _version_paths(self, version):
+        directory = os.path.join(self.root, version)
+        return {key: os.path.join(directory, name) for key, name in self.manifest(version)["files"].items()}
+
+    # -- loading and swapping ----------------------------------------------
+
+    def registry_for(self, version):
+        """A plain, unwarmed registry pinned to `version`, independent of the one being served"""
+        if version == BASELINE:
+            registry = ModelRegistry(paths=_baseline_paths())
+        else:
+            registry = ModelRegistry(paths=self._version_paths(version), artifact_dir=self._artifact_dir(version))
+        registry.version = version
+        return registry
+
+    def load(self, version):
+        """Build and warm a registry for `version` without touching the one being served"""
+        registry = self.registry_for(version)
+        active = self._active
+        if active is not None:
+            registry.adopt(active)
+        registry.preload()
+        vect_text = registry.vectorizer().transform([WARMUP_TEXT])
+        for key in registry.paths:
+            if key.endswith("_model") and registry.is_loaded(key):
+                registry.get(key).predict(vect_text)
+        return registry
+
+    def registry(self):
+        """The registry of the version being served"""
+        active = self._active
+        if active is None:
+            with self._lock:
+                if self._active is None:
+                    # First use loads lazily, like a plain ModelRegistry, instead of warming everything
+                    self._active = self.registry_for(self.current_version())
+                active = self._active
+        return active
+
+    @property
+    def version(self):
+        return self.registry().version
+
+    def swap(self, registry):
+        """Make `registry` the one served; the replaced one is kept for rollback"""
+        with self._lock:
+            self._previous, self._active = self._active, registry
+            self.swaps += 1
+
+    def check(self):
+        """Swap in the version named in CURRENT if it differs from the one served"""
+        target = self.current_version()
+        active = self.registry()
+        if target == active.version:
+            return False
+        previous = self._previous
+        if previous is not None and previous.version == target:
+            self.swap(previous)
+            return True
+        try:
+            registry = self.load(target)
+        except Exception as e:
+            # Keep serving the current version; the next poll tries again
+            self.errors += 1
+            self.last_error = f"{target}: {e}"
+            return False
+        self.swap(registry)
+        return True
+
+    def rollback(self):
+        """Serve the previous version again and record it in CURRENT; returns its name"""
+        previous = self._previous
+        if previous is None:
+            versions = [BASELINE] + self.versions()
+            index = versions.index(self.version) if self.version in versions else 0
+            if index == 0:
+                raise RuntimeError("No earlier model version to roll back to")
+            previous = self.load(versions[index - 1])
+        self.activate(previous.version)
+        self.swap(previous)
+        return previous.version
+
+    # -- watcher -----------------------------------------------------------
+
+    def start_watcher(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._watch, name="model-watcher", daemon=True)
+            self._thread.start()
+
+    def stop_watcher(self, timeout=5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _watch(self):
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def metrics(self):
+        """Numeric stats of the served version, for metrics.Metrics"""
+        loaded = self.registry().stats().values()
+        return {"swaps": self.swaps, "swap_errors": self.errors, "loaded": len(loaded),
+                "memory_bytes": sum(info["memory_bytes"] for info in loaded),
+                "load_seconds": sum(info["load_seconds"] for info in loaded)}
+
+    def stats(self):
+        previous = self._previous
+        return {"version": self.version, "previous": previous.version if previous else None,
+                "available": self.versions(), "swaps": self.swaps, "errors": self.errors,
+                "last_error": self.last_error}
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_model_store():
+    """Return the model store shared by everything running in this process, watching for new versions"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ModelStore()
+                _store.start_watcher()
+                get_metrics().register_collector("models", _store.metrics)
+    return _store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage versioned model files")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="List published versions")
+    publish = sub.add_parser("publish", help="Publish a new version")
+    publish.add_argument("--file", action="append", default=[], metavar="KEY=PATH",
+                         help="Model file to include, e.g. svm_model=new_svm.pkl (repeatable)")
+    publish.add_argument("--note", default="")
+    publish.add_argument("--activate", action="store_true", help="Serve the new version straight away")
+    activate = sub.add_parser("activate", help="Serve an existing version")
+    activate.add_argument("version")
+    sub.add_parser("rollback", help="Serve the version published before the current one")
+    prune = sub.add_parser("prune", help="Delete old versions")
+    prune.add_argument("--keep", type=int, default=None,
+                       help=f"Versions to keep besides the active one (default {model_retention})")
+    args = parser.parse_args()
+
+    store = ModelStore()
+    if args.command == "list":
+        current = store.current_version()
+        for version in store.versions():
+            manifest = store.manifest(version)
+            marker = "*" if version == current else " "
+            created = time.strftime("%Y-%m-%d %H:%M", time.localtime(manifest["created"]))
+            print(f"{marker} {version}  {created}  {', '.join(sorted(manifest['files']))}  {manifest['note']}")
+        if current == BASELINE:
+            print(f"* {BASELINE} (files in config.paths)")
+    elif args.command == "publish":
+        files = {}
+        for item in args.file:
+            key, sep, path = item.partition("=")
+            if not sep:
+                parser.error(f"Expected KEY=PATH, got {item}")
+            files[key] = path
+        print(store.publish(files, args.note, args.activate))
+    elif args.command == "activate":
+        store.activate(args.version)
+        print(args.version)
+    elif args.command == "prune":
+        for version in store.prune(args.keep):
+            print(f"deleted {version}")
+    else:
+        versions = [BASELINE] + store.versions()
+        current = store.current_version()
+        index = versions.index(current)
+        if index == 0:
+            parser.error("No earlier model version to roll back to")
+        store.activate(versions[index - 1])
+        print(versions[index - 1])
+
+
+if __name__ == '__main__':
+    main()
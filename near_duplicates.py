@@ -0,0 +1,228 @@
+"""MinHash/LSH index of classified articles, to reuse labels for near-duplicates.
+
+Wire stories are republished with trivial edits (a new headline, a byline, a
+corrected figure). Each article is reduced to the set of its word 3-grams
+and summarised by a MinHash signature; the fraction of equal signature
+positions estimates the Jaccard similarity of two articles. Signatures are
+split into bands and every band is hashed into a bucket, so a lookup only
+compares against articles sharing at least one bucket rather than the whole
+index. With 64 hashes in 8 bands of 8, pairs above ~0.77 similarity are
+likely to collide.
+"""
+import atexit
+import json
+import os
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+from config import near_duplicate_settings
+from metrics import get_metrics
+from prediction_cache import normalise_text
+
+_WORD = re.compile(r"\w+")
+
+
+def shingles(text, size=3):
+    """The set of word `size`-grams of the normalised text"""
+    words = _WORD.findall(normalise_text(text))
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+class MinHasher:
+    """MinHash signatures from `num_perm` multiply-shift hash functions of the CRC32 of each shingle"""
+
+    def __init__(self, num_perm=64, seed=1):
+        self.num_perm = num_perm
+        self.seed = seed
+        rng = np.random.default_rng(seed)
+        # Odd multipliers; the products wrap modulo 2**64 and the top 32 bits are the hash
+        self.a = rng.integers(1, 2 ** 63, size=(num_perm, 1), dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self.b = rng.integers(0, 2 ** 63, size=(num_perm, 1), dtype=np.uint64)
+
+    def signature(self, text):
+        """Signature of `text` as a uint32 array, or None if it has no words"""
+        grams = shingles(text)
+        if not grams:
+            return None
+        x = np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+        hashed = (self.a * x + self.b) >> np.uint64(32)
+        return hashed.min(axis=1).astype(np.uint32)
+
+
+class NearDuplicateIndex:
+    """LSH index from article signatures to the labels each model gave them.
+
+    Labels are stored per model key (callers include the model version), so a
+    match only reuses a category computed by the same model. The oldest
+    articles are evicted beyond `maxsize`. When `path` is set the index is
+    loaded from and periodically saved to that .npz file.
+    """
+
+    def __init__(self, threshold=0.8, num_perm=64, bands=8, maxsize=100000, path=None, persist_every=100):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.maxsize = maxsize
+        self.path = path
+        self.persist_every = persist_every
+        self.hasher = MinHasher(num_perm)
+        self.lookups = 0
+        self.hits = 0
+        self.lookup_seconds = 0.0
+        self._entries = OrderedDict()
+        self._buckets = [{} for _ in range(bands)]
+        self._next_id = 0
+        self._dirty = 0
+        self._lock = threading.Lock()
+        if path:
+            self.load()
+            atexit.register(self.save)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _band_keys(self, signature):
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def lookup(self, text, model_key, signature=None):
+        """Return {"label", "similarity"} for the most similar indexed article above the threshold, or None"""
+        start = time.perf_counter()
+        signature = self.hasher.signature(text) if signature is None else signature
+        best = None
+        if signature is not None:
+            with self._lock:
+                doc_id, similarity = self._nearest(signature, model_key)
+                if doc_id is not None:
+                    best = {"label": self._entries[doc_id][1][model_key], "similarity": similarity}
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.lookups += 1
+            self.hits += best is not None
+            self.lookup_seconds += elapsed
+        get_metrics().observe("near_duplicate_lookup", elapsed)
+        return best
+
+    def _nearest(self, signature, model_key=None):
+        """(doc_id, similarity) of the most similar entry above the threshold, optionally one labelled
+        by `model_key`, or (None, None); call with the lock held"""
+        candidates = set()
+        for band, key in zip(self._buckets, self._band_keys(signature)):
+            candidates.update(band.get(key, ()))
+        best, best_similarity = None, None
+        for doc_id in candidates:
+            other, labels = self._entries[doc_id]
+            if model_key is not None and model_key not in labels:
+                continue
+            similarity = float(np.mean(other == signature))
+            if similarity >= self.threshold and (best is None or similarity > best_similarity):
+                best, best_similarity = doc_id, similarity
+        return best, best_similarity
+
+    def add(self, text, model_key, label, signature=None):
+        """Index `text` with the label `model_key` gave it.
+
+        If a near-duplicate is already indexed, the label is stored on that
+        entry instead of a second copy of the signature; a label the entry
+        already has for `model_key` is kept. Only model predictions belong
+        here: user corrections go to the feedback store, never to this index.
+        """
+        signature = self.hasher.signature(text) if signature is None else signature
+        if signature is None:
+            return
+        with self._lock:
+            doc_id, _ = self._nearest(signature)
+            if doc_id is None:
+                self._insert(self._next_id, signature, {model_key: label})
+                self._next_id += 1
+                while len(self._entries) > self.maxsize:
+                    self._remove(next(iter(self._entries)))
+            else:
+                self._entries[doc_id][1].setdefault(model_key, label)
+                self._entries.move_to_end(doc_id)
+            self._dirty += 1
+            flush = self.path and self._dirty >= self.persist_every
+        if flush:
+            self.save()
+
+    def _insert(self, doc_id, signature, labels):
+        self._entries[doc_id] = (signature, labels)
+        for band, key in zip(self._buckets, self._band_keys(signature)):
+            band.setdefault(key, []).append(doc_id)
+
+    def _remove(self, doc_id):
+        signature, _ = self._entries.pop(doc_id)
+        for band, key in zip(self._buckets, self._band_keys(signature)):
+            bucket = band[key]
+            bucket.remove(doc_id)
+            if not bucket:
+                del band[key]
+
+    def stats(self):
+        return {
+            "size": len(self._entries),
+            "buckets": sum(len(band) for band in self._buckets),
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "hit_rate": self.hits / self.lookups if self.lookups else 0.0,
+            "mean_lookup_ms": self.lookup_seconds / self.lookups * 1000 if self.lookups else 0.0,
+        }
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            ids = np.fromiter(self._entries, dtype=np.int64, count=len(self._entries))
+            signatures = np.array([sig for sig, _ in self._entries.values()], dtype=np.uint32).reshape(
+                len(ids), self.hasher.num_perm)
+            labels = json.dumps([labels for _, labels in self._entries.values()])
+            self._dirty = 0
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, ids=ids, signatures=signatures, labels=np.array(labels),
+                     params=np.array([self.hasher.num_perm, self.hasher.seed, self.bands]))
+        os.replace(tmp_path, self.path)
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with np.load(self.path) as data:
+                params = data["params"].tolist()
+                ids, signatures = data["ids"], data["signatures"]
+                labels = json.loads(str(data["labels"]))
+        except (OSError, ValueError, KeyError):
+            return
+        # Signatures made with other hash functions or banding are not comparable
+        if params != [self.hasher.num_perm, self.hasher.seed, self.bands]:
+            return
+        with self._lock:
+            for doc_id, signature, entry_labels in zip(ids.tolist(), signatures, labels):
+                self._insert(doc_id, signature, entry_labels)
+            while len(self._entries) > self.maxsize:
+                self._remove(next(iter(self._entries)))
+            self._next_id = max(self._entries, default=-1) + 1
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_near_duplicate_index():
+    """Return the near-duplicate index shared by every session in this process"""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = NearDuplicateIndex(**near_duplicate_settings)
+                get_metrics().register_collector("near_duplicates", _index.stats)
+    return _index
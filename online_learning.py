@@ -0,0 +1,144 @@
+"""Incremental training of a logistic model from corrected labels.
+
+    python online_learning.py            # keep polling for new corrections
+    python online_learning.py --once     # apply the pending ones, snapshot and exit
+
+Corrections sent from the Feedback page are stored with kind "correction".
+This worker reads the ones it has not applied yet and updates an
+SGDClassifier with `partial_fit` on rows of the existing TF-IDF vectorizer,
+a few milliseconds per mini-batch. Every so often the model is published as
+a new version in the model store (see model_store.py), where the Prediction
+page serves it as "Online Logistic Regression (SGD)".
+
+The first version starts from the Logistic Regression weights, so until
+corrections arrive it predicts exactly like that model. Run one worker per
+model store.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import joblib
+from sklearn.linear_model import SGDClassifier
+
+from config import online_learning as default_settings
+from feedback_store import read_feedback
+from model_store import ModelStore
+
+
+def from_logistic(lr, vectorizer, learning_rate=0.05):
+    """An SGDClassifier that starts with the weights of a fitted LogisticRegression"""
+    model = SGDClassifier(loss="log_loss", learning_rate="constant", eta0=learning_rate, alpha=1e-6)
+    # partial_fit allocates coef_ and intercept_; later calls keep whatever values they hold
+    model.partial_fit(vectorizer.transform([""]), [lr.classes_[0]], classes=lr.classes_)
+    model.coef_[:] = lr.coef_
+    model.intercept_[:] = lr.intercept_
+    model.last_feedback_id_ = 0
+    return model
+
+
+class OnlineLearner:
+    """Apply corrected labels to the online model in mini-batches and snapshot it as model versions"""
+
+    def __init__(self, store=None, feedback_path=None, batch_size=32, learning_rate=0.05,
+                 snapshot_every=500, snapshot_interval=1800.0, poll_interval=10.0, activate=True, log=print):
+        self.store = store or ModelStore()
+        self.feedback_path = feedback_path
+        self.batch_size = batch_size
+        self.snapshot_every = snapshot_every
+        self.snapshot_interval = snapshot_interval
+        self.poll_interval = poll_interval
+        self.activate = activate
+        self.log = log
+
+        registry = self.store.registry()
+        self.vectorizer = registry.vectorizer()
+        online_path = registry.paths.get("online_model", "")
+        if os.path.exists(online_path):
+            # Resume from the latest snapshot; joblib rather than the registry, which may
+            # have swapped it for a LinearModel that cannot be trained
+            self.model = joblib.load(online_path)
+        else:
+            self.model = from_logistic(joblib.load(registry.paths["lr_model"]), self.vectorizer, learning_rate)
+        self.last_id = getattr(self.model, "last_feedback_id_", 0)
+
+        self.applied = 0
+        self.skipped = 0
+        self.pending = 0
+        self.update_seconds = 0.0
+        self.last_snapshot = time.monotonic()
+
+    def update(self, texts, labels):
+        """One partial_fit step on a mini-batch of corrected articles"""
+        start = time.perf_counter()
+        self.model.partial_fit(self.vectorizer.transform(texts), labels)
+        self.update_seconds += time.perf_counter() - start
+        self.applied += len(texts)
+        self.pending += len(texts)
+
+    def poll(self, limit=1000):
+        """Apply the corrections stored since the last one seen; returns how many were applied"""
+        records = read_feedback(self.feedback_path, kind="correction", limit=limit, after_id=self.last_id)
+        texts, labels = [], []
+        for record in records:
+            self.last_id = record["id"]
+            label = json.loads(record["data"] or "{}").get("label")
+            if record["article_text"] and label in self.model.classes_:
+                texts.append(record["article_text"])
+                labels.append(label)
+            else:
+                self.skipped += 1
+        for start in range(0, len(texts), self.batch_size):
+            self.update(texts[start:start + self.batch_size], labels[start:start + self.batch_size])
+        return len(texts)
+
+    def due(self):
+        return self.pending >= self.snapshot_every or (
+            self.pending > 0 and time.monotonic() - self.last_snapshot >= self.snapshot_interval)
+
+    def snapshot(self):
+        """Publish the model as a new version, served straight away if `activate`; returns its name"""
+        self.model.last_feedback_id_ = self.last_id
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "online_sgd_model.pkl")
+            joblib.dump(self.model, path)
+            version = self.store.publish({"online_model": path}, activate=self.activate,
+                                         note=f"online learning up to feedback #{self.last_id}")
+        self.pending = 0
+        self.last_snapshot = time.monotonic()
+        return version
+
+    def run(self, once=False):
+        while True:
+            applied = self.poll()
+            if applied:
+                self.log(f"Applied {applied} corrections ({self.applied} in total, "
+                         f"{self.update_seconds / self.applied * 1000:.2f} ms per article)")
+            if self.due() or (once and self.pending):
+                self.log(f"Published {self.snapshot()}")
+            if once:
+                return
+            time.sleep(self.poll_interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the online model from corrected labels")
+    parser.add_argument("--once", action="store_true", help="Apply pending corrections, snapshot and exit")
+    parser.add_argument("--no-activate", action="store_true",
+                        help="Publish snapshots without switching the app to them")
+    args = parser.parse_args()
+
+    log = lambda message: print(message, file=sys.stderr)
+    learner = OnlineLearner(activate=not args.no_activate, log=log, **default_settings)
+    try:
+        learner.run(once=args.once)
+    except KeyboardInterrupt:
+        if learner.pending:
+            log(f"Published {learner.snapshot()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+import atexit
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from config import cache_settings
+from metrics import get_metrics
+
+
+def normalise_text(text):
+    """Collapse case and whitespace, which the TF-IDF vectorizer ignores anyway"""
+    return " ".join(str(text).lower().split())
+
+
+def cache_key(text, model_key):
+    digest = hashlib.sha256(normalise_text(text).encode("utf-8")).hexdigest()
+    return f"{model_key}:{digest}"
+
+
+class PredictionCache:
+    """Bounded LRU cache of predictions with a time-to-live per entry.
+
+    Entries are keyed on the model and a hash of the normalised article text.
+    When `path` is set, the cache is loaded from and periodically written to a
+    JSON file so that it survives restarts.
+    """
+
+    def __init__(self, maxsize=10000, ttl=24 * 3600, path=None, persist_every=100):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.path = path
+        self.persist_every = persist_every
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._dirty = 0
+        if path:
+            self.load()
+            atexit.register(self.save)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, text, model_key):
+        key = cache_key(text, model_key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > time.time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, text, model_key, value):
+        key = cache_key(text, model_key)
+        with self._lock:
+            self._entries[key] = (value, time.time() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            self._dirty += 1
+            flush = self.path and self._dirty >= self.persist_every
+        if flush:
+            self.save()
+
+    def get_or_compute(self, text, model_key, compute):
+        """Return the cached prediction, or call `compute()` and cache its result"""
+        value = self.get(text, model_key)
+        if value is None:
+            value = compute()
+            self.put(text, model_key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._dirty += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        with self._lock:
+            for key, (value, expires) in stored.items():
+                if expires > now:
+                    self._entries[key] = (value, expires)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            snapshot = {key: list(entry) for key, entry in self._entries.items()}
+            self._dirty = 0
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f)
+        os.replace(tmp_path, self.path)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_prediction_cache():
+    """Return the prediction cache shared by every session in this process"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = PredictionCache(**cache_settings)
+                get_metrics().register_collector("prediction_cache", _cache.stats)
+    return _cache
@@ -0,0 +1,228 @@
+"""Re-classify an archive of articles offline on a pool of worker processes.
+
+    python relabel.py archive.jsonl --out labels.csv --model svm_model --workers 8
+    python relabel.py articles_dir/ --out labels.csv        # *.csv, *.jsonl and *.txt files
+
+The archive is split into shards of `--chunk-size` articles. Each worker process
+loads the models once and classifies whole shards; results are appended to the
+output CSV as shards finish, and a checkpoint file next to it records which
+shards are done so an interrupted run picks up where it stopped.
+
+Every worker serves the model version that was active when the job started,
+recorded in the checkpoint: versions published mid-run are not picked up, and
+a run is only resumed with the version it started with.
+"""
+import argparse
+import csv
+import json
+import os
+import signal
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from batch_classify import detect_format, read_articles, resolve_text_column
+from config import models
+
+ARCHIVE_EXTENSIONS = (".csv", ".jsonl", ".json", ".ndjson")
+
+_worker = {}
+
+
+def _init_worker(model_key, version):
+    from model_store import ModelStore
+
+    # Ctrl-C is handled by the parent, which cancels outstanding shards
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    # A plain registry, not the process-wide store, so no watcher can swap models mid-run
+    registry = ModelStore().registry_for(version)
+    _worker["model"] = registry.get(model_key)
+    _worker["vectorizer"] = registry.vectorizer()
+
+
+def _classify_shard(shard_id, ids, texts=None, files=None):
+    if files is not None:
+        texts = []
+        for path in files:
+            with open(path, encoding="utf-8", errors="replace") as f:
+                texts.append(f.read())
+    labels = _worker["model"].predict(_worker["vectorizer"].transform(texts))
+    return shard_id, ids, [str(label) for label in labels]
+
+
+def list_sources(path):
+    """Return (archives, text_files) found at `path`, in a stable order"""
+    if os.path.isfile(path):
+        return [path], []
+    archives, text_files = [], []
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            full = os.path.join(root, name)
+            if name.lower().endswith(ARCHIVE_EXTENSIONS):
+                archives.append(full)
+            elif name.lower().endswith(".txt"):
+                text_files.append(full)
+    return archives, text_files
+
+
+def iter_shards(path, chunk_size, text_column=None, id_column=None):
+    """Yield (shard_id, kwargs for _classify_shard) for every shard of the input"""
+    base = path if os.path.isdir(path) else os.path.dirname(path)
+    archives, text_files = list_sources(path)
+
+    for archive in archives:
+        name = os.path.relpath(archive, base)
+        row = 0
+        for index, chunk in enumerate(read_articles(archive, detect_format(archive), chunk_size)):
+            column = resolve_text_column(chunk.columns, text_column)
+            if id_column:
+                ids = chunk[id_column].astype(str).tolist()
+            else:
+                ids = [f"{name}:{row + i}" for i in range(len(chunk))]
+            row += len(chunk)
+            yield f"{name}#{index}", {"ids": ids, "texts": chunk[column].fillna("").astype(str).tolist()}
+
+    for index in range(0, len(text_files), chunk_size):
+        files = text_files[index:index + chunk_size]
+        yield f"txt#{index // chunk_size}", {"ids": [os.path.relpath(f, base) for f in files],
+                                              "files": files}
+
+
+class Checkpoint:
+    """Append-only record of finished shards and the output size after each one"""
+
+    def __init__(self, path, settings):
+        self.path = path
+        self.settings = settings
+        self.done = set()
+        self.offset = 0
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as f:
+            lines = [json.loads(line) for line in f if line.strip()]
+        if lines and lines[0].get("settings") != self.settings:
+            raise SystemExit(f"Checkpoint {self.path} was written with different settings "
+                             f"{lines[0].get('settings')}; use --no-resume to start over")
+        for entry in lines[1:]:
+            self.done.add(entry["shard"])
+            self.offset = entry["offset"]
+
+    def start(self):
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"settings": self.settings}) + "\n")
+
+    def record(self, shard_id, offset):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"shard": shard_id, "offset": offset}) + "\n")
+        self.done.add(shard_id)
+
+
+def relabel(path, out_path, model_key, workers=None, chunk_size=1000, text_column=None,
+            id_column=None, resume=True, log=print):
+    """Classify every article under `path` into `out_path`; returns (articles, seconds)"""
+    from model_store import ModelStore
+
+    workers = workers or os.cpu_count() or 1
+    version = ModelStore().current_version()
+    checkpoint = Checkpoint(f"{out_path}.checkpoint", {
+        "input": os.path.abspath(path), "model": model_key, "model_version": version,
+        "chunk_size": chunk_size, "text_column": text_column, "id_column": id_column,
+    })
+    if resume:
+        checkpoint.load()
+
+    fresh = not checkpoint.done or not os.path.exists(out_path)
+    if fresh:
+        checkpoint.done.clear()
+        checkpoint.offset = 0
+        checkpoint.start()
+    out = open(out_path, "w" if fresh else "r+", newline="", encoding="utf-8")
+    # Drop rows written after the last checkpoint, so a crash never duplicates them
+    out.seek(checkpoint.offset)
+    out.truncate()
+    writer = csv.writer(out)
+    if fresh:
+        writer.writerow(["id", "prediction", "model"])
+
+    log(f"Classifying with {model_key} from model version {version}")
+    n_articles = 0
+    start = time.perf_counter()
+    last_report = start
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                               initargs=(model_key, version))
+    try:
+        pending = set()
+        shards = (s for s in iter_shards(path, chunk_size, text_column, id_column)
+                  if s[0] not in checkpoint.done)
+        exhausted = False
+        while pending or not exhausted:
+            # Keep a couple of shards queued per worker without reading the whole archive
+            while not exhausted and len(pending) < workers * 2:
+                shard = next(shards, None)
+                if shard is None:
+                    exhausted = True
+                    break
+                pending.add(pool.submit(_classify_shard, shard[0], **shard[1]))
+            if not pending:
+                break
+
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                shard_id, ids, labels = future.result()
+                writer.writerows((i, label, model_key) for i, label in zip(ids, labels))
+                out.flush()
+                os.fsync(out.fileno())
+                checkpoint.record(shard_id, out.tell())
+                n_articles += len(ids)
+
+            now = time.perf_counter()
+            if now - last_report >= 5:
+                log(f"{n_articles} articles, {n_articles / (now - start):,.0f} articles/s")
+                last_report = now
+    except BaseException:
+        # Ctrl-C or a failed shard: stop without waiting for queued shards; the
+        # checkpoint already covers everything written so far
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    else:
+        pool.shutdown()
+    finally:
+        out.close()
+
+    return n_articles, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-classify an archive of news articles")
+    parser.add_argument("input", help="CSV/JSONL archive, or a directory of archives and .txt files")
+    parser.add_argument("--out", required=True, help="Output CSV of id, prediction, model")
+    parser.add_argument("--model", default="svm_model",
+                        help=f"Model key or display name ({', '.join(models.values())})")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Articles per shard")
+    parser.add_argument("--text-column", default=None)
+    parser.add_argument("--id-column", default=None)
+    parser.add_argument("--no-resume", action="store_true", help="Ignore an existing checkpoint")
+    args = parser.parse_args()
+
+    model_key = models.get(args.model, args.model)
+    if model_key not in models.values():
+        parser.error(f"Unknown model: {args.model}")
+
+    log = lambda message: print(message, file=sys.stderr)
+    try:
+        n_articles, seconds = relabel(args.input, args.out, model_key, args.workers, args.chunk_size,
+                                      args.text_column, args.id_column, not args.no_resume, log)
+    except KeyboardInterrupt:
+        log("Interrupted; run the same command again to resume from the checkpoint")
+        sys.exit(130)
+    rate = n_articles / seconds if seconds else 0.0
+    log(f"Classified {n_articles} articles in {seconds:.1f}s ({rate:,.0f} articles/s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,284 @@
+"""Headless classification HTTP service sharing the Streamlit app's models.
+
+Run locally with:
+
+    python service.py --port 8000
+
+    curl -X POST localhost:8000/classify -d '{"text": "The striker scored twice", "model": "svm_model"}'
+    curl -X POST localhost:8000/classify/batch -d '{"texts": ["...", "..."]}'
+
+Requests arriving within a few milliseconds of each other are micro-batched
+into a single `vectorizer.transform` and `predict` call per model.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from config import models, service_metrics_path
+from metrics import get_metrics
+from model_registry import get_registry
+
+DEFAULT_MODEL = "lr_model"
+
+# Accept either the path key ("svm_model") or the display name used in the app
+MODEL_NAMES = {key: name for name, key in models.items()}
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def resolve_model(name):
+    name = name or DEFAULT_MODEL
+    if name in MODEL_NAMES:
+        return name
+    if name in models:
+        return models[name]
+    raise HTTPError(404, f"Unknown model: {name}")
+
+
+class MicroBatcher:
+    """Collect concurrent requests for one model and classify them together.
+
+    The first queued request opens a window of `max_wait` seconds (or until
+    `max_batch` texts are waiting); everything gathered in that window is
+    vectorised as one sparse matrix and predicted in a worker thread so the
+    event loop keeps accepting connections meanwhile.
+    """
+
+    def __init__(self, registry, model_key, max_batch=256, max_wait=0.005):
+        # A registry, or a function returning the one currently served
+        self.registry = registry if callable(registry) else lambda: registry
+        self.model_key = model_key
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.queue = asyncio.Queue()
+        self.batches = 0
+        self.texts = 0
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def classify(self, texts):
+        """Queue a list of texts and wait for their labels"""
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((list(texts), future))
+        return await future
+
+    def _predict(self, texts):
+        # Resolved per batch so a hot-swapped model version is picked up between batches
+        registry = self.registry()
+        model = registry.get(self.model_key)
+        vect_text = registry.vectorizer().transform(texts)
+        return [str(label) for label in model.predict(vect_text)]
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = [await self.queue.get()]
+            size = len(pending[0][0])
+            deadline = loop.time() + self.max_wait
+            while size < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                pending.append(item)
+                size += len(item[0])
+
+            texts = [text for item_texts, _ in pending for text in item_texts]
+            try:
+                labels = await loop.run_in_executor(None, self._predict, texts)
+            except Exception as e:
+                for _, future in pending:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.texts += len(texts)
+            offset = 0
+            for item_texts, future in pending:
+                if not future.done():
+                    future.set_result(labels[offset:offset + len(item_texts)])
+                offset += len(item_texts)
+
+
+class ClassificationService:
+    """Route JSON requests to one micro-batcher per model"""
+
+    def __init__(self, registry=None, max_batch=256, max_wait=0.005):
+        self._registry = registry
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.batchers = {}
+
+    @property
+    def registry(self):
+        """The registry passed in, or else the model version currently served"""
+        return self._registry or get_registry()
+
+    def batcher(self, model_key):
+        if model_key not in self.batchers:
+            if not self.registry.available(model_key):
+                raise HTTPError(404, f"Model not available: {model_key}")
+            self.batchers[model_key] = MicroBatcher(lambda: self.registry, model_key,
+                                                    self.max_batch, self.max_wait)
+        return self.batchers[model_key]
+
+    async def classify(self, payload):
+        text = payload.get("text")
+        if not isinstance(text, str):
+            raise HTTPError(400, "Expected a JSON body with a 'text' string")
+        model_key = resolve_model(payload.get("model"))
+        start = time.perf_counter()
+        labels = await self.batcher(model_key).classify([text])
+        return {"label": labels[0], "model": MODEL_NAMES[model_key], "model_key": model_key,
+                "latency_ms": (time.perf_counter() - start) * 1000}
+
+    async def classify_batch(self, payload):
+        texts = payload.get("texts")
+        if not isinstance(texts, list) or not all(isinstance(t, str) for t in texts):
+            raise HTTPError(400, "Expected a JSON body with a 'texts' list of strings")
+        model_key = resolve_model(payload.get("model"))
+        start = time.perf_counter()
+        labels = await self.batcher(model_key).classify(texts) if texts else []
+        return {"labels": labels, "model": MODEL_NAMES[model_key], "model_key": model_key,
+                "latency_ms": (time.perf_counter() - start) * 1000}
+
+    def health(self):
+        return {
+            "status": "ok",
+            "version": self.registry.version,
+            "models": self.registry.stats(),
+            "batchers": {key: {"batches": b.batches, "texts": b.texts}
+                         for key, b in self.batchers.items()},
+        }
+
+    async def dispatch(self, method, path, body):
+        routes = {
+            "/classify": self.classify,
+            "/classify/batch": self.classify_batch,
+        }
+        path = path.split("?", 1)[0].rstrip("/") or "/"
+        if path == "/health":
+            return self.health()
+        if path not in routes:
+            raise HTTPError(404, f"No route for {path}")
+        if method != "POST":
+            raise HTTPError(405, f"{path} only accepts POST")
+        try:
+            payload = json.loads(body or b"{}")
+        except ValueError:
+            raise HTTPError(400, "Request body is not valid JSON")
+        if not isinstance(payload, dict):
+            raise HTTPError(400, "Request body must be a JSON object")
+        return await routes[path](payload)
+
+
+async def read_request(reader, max_body=10 * 1024 * 1024):
+    """Parse a minimal HTTP/1.1 request: (method, path, body)"""
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    try:
+        method, path, _ = request_line.decode("latin-1").split(" ", 2)
+    except ValueError:
+        raise HTTPError(400, "Malformed request line")
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    length = int(headers.get("content-length") or 0)
+    if length > max_body:
+        raise HTTPError(413, "Request body too large")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), path, body
+
+
+def write_response(writer, status, payload):
+    body = json.dumps(payload).encode("utf-8")
+    head = (f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: close\r\n\r\n")
+    writer.write(head.encode("latin-1") + body)
+
+
+async def serve(service, host="127.0.0.1", port=8000):
+    async def handle(reader, writer):
+        try:
+            try:
+                request = await read_request(reader)
+                if request is None:
+                    return
+                status, payload = 200, await service.dispatch(*request)
+            except HTTPError as e:
+                status, payload = e.status, {"error": str(e)}
+            except Exception as e:
+                status, payload = 500, {"error": str(e)}
+            write_response(writer, status, payload)
+            await writer.drain()
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="News classification HTTP service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-batch", type=int, default=256,
+                        help="Largest number of texts classified in one call")
+    parser.add_argument("--max-wait-ms", type=float, default=5.0,
+                        help="How long the first request in a batch waits for company")
+    parser.add_argument("--no-preload", action="store_true",
+                        help="Load models on first request instead of at startup")
+    args = parser.parse_args()
+
+    get_metrics().start_writer(service_metrics_path)
+    service = ClassificationService(max_batch=args.max_batch, max_wait=args.max_wait_ms / 1000)
+    if not args.no_preload:
+        service.registry.preload()
+
+    async def run():
+        server = await serve(service, args.host, args.port)
+        print(f"Serving on http://{args.host}:{args.port}")
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+import codecs
+import re
+
+import numpy as np
+import scipy.sparse as sp
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+_TRAILING_WORD = re.compile(r"\w+$")
+
+
+def iter_chunks(source, chunk_size=DEFAULT_CHUNK_SIZE, encoding="utf-8"):
+    """Yield text chunks from a string, a file-like object or an iterable of str/bytes"""
+    if isinstance(source, str):
+        for start in range(0, len(source), chunk_size):
+            yield source[start:start + chunk_size]
+        return
+
+    if hasattr(source, "read"):
+        reader = source
+        source = iter(lambda: reader.read(chunk_size), reader.read(0))
+
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    for chunk in source:
+        if isinstance(chunk, (bytes, bytearray)):
+            chunk = decoder.decode(chunk)
+        if chunk:
+            yield chunk
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+class StreamingVectorizer:
+    """TF-IDF for arbitrarily long articles, one chunk at a time.
+
+    Produces the same row as the fitted TfidfVectorizer (or artifacts.CompactVectorizer)
+    it wraps, but never holds the whole article or its token list: term counts
+    accumulate in one array of vocabulary size, and only the partial word at
+    the end of each chunk is carried over to the next.
+    """
+
+    def __init__(self, vectorizer, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.vectorizer = vectorizer
+        self.chunk_size = chunk_size
+        self.lowercase = vectorizer.lowercase
+        self.token_pattern = re.compile(vectorizer.token_pattern) \
+            if isinstance(vectorizer.token_pattern, str) else vectorizer.token_pattern
+
+        if hasattr(vectorizer, "vocabulary_"):
+            vocabulary = vectorizer.vocabulary_
+            self.n_features = len(vocabulary)
+            self.idf = vectorizer.idf_
+            self.norm = vectorizer.norm
+            self.sublinear_tf = vectorizer.sublinear_tf
+            self._lookup = lambda terms: np.fromiter(
+                (vocabulary.get(t, -1) for t in terms), dtype=np.int64, count=len(terms))
+            self.max_token_chars = max(map(len, vocabulary), default=0)
+        else:
+            self.n_features = vectorizer.n_features
+            self.idf = vectorizer.idf
+            self.norm = vectorizer.norm
+            self.sublinear_tf = vectorizer.sublinear_tf
+            self._lookup = vectorizer.lookup
+            # UTF-8 byte lengths are an upper bound on character lengths
+            ends = np.append(vectorizer.offsets[1:], len(vectorizer.terms_blob))
+            self.max_token_chars = int((ends - vectorizer.offsets).max(initial=0))
+
+    def _count(self, text, counts):
+        tokens = self.token_pattern.findall(text)
+        if not tokens:
+            return
+        terms, n = np.unique(np.array(tokens, dtype=object), return_counts=True)
+        columns = self._lookup(list(terms))
+        known = columns >= 0
+        np.add.at(counts, columns[known], n[known])
+
+    def count_terms(self, source):
+        """Return a dense array of raw term counts for one streamed article"""
+        counts = np.zeros(self.n_features, dtype=np.int32)
+        carry = ""
+        skipping = False
+        for chunk in iter_chunks(source, self.chunk_size):
+            if self.lowercase:
+                chunk = chunk.lower()
+            if skipping:
+                # Still inside a word longer than any vocabulary term: drop it
+                stripped = re.sub(r"^\w+", "", chunk)
+                if not stripped:
+                    continue
+                chunk, skipping = stripped, False
+
+            text = carry + chunk
+            match = _TRAILING_WORD.search(text)
+            if match is None:
+                carry = ""
+            else:
+                carry = text[match.start():]
+                text = text[:match.start()]
+                if len(carry) > self.max_token_chars:
+                    carry, skipping = "", True
+            self._count(text, counts)
+
+        if carry:
+            self._count(carry, counts)
+        return counts
+
+    def transform_stream(self, source):
+        """Vectorise one article given as a string, file-like object or chunk iterable"""
+        counts = self.count_terms(source)
+        columns = np.flatnonzero(counts)
+        tf = counts[columns].astype(np.float64)
+        if self.sublinear_tf:
+            tf = np.log(tf) + 1
+        values = tf * self.idf[columns]
+        if len(values) and self.norm == "l2":
+            values /= np.sqrt(np.dot(values, values))
+        elif len(values) and self.norm == "l1":
+            values /= np.abs(values).sum()
+        return sp.csr_matrix((values, columns, [0, len(columns)]), shape=(1, self.n_features))
+
+    def transform(self, sources):
+        """Vectorise several streamed articles into one sparse matrix"""
+        rows = [self.transform_stream(source) for source in sources]
+        if not rows:
+            return sp.csr_matrix((0, self.n_features))
+        return sp.vstack(rows, format="csr")
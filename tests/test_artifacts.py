@@ -0,0 +1,57 @@
+"""CompactVectorizer and exported models reproduce the pickled vectorizer and estimators"""
+import numpy as np
+import pytest
+
+from artifacts import export_artifacts, load_artifacts
+from linear_engine import LINEAR_MODEL_KEYS, synthetic_texts
+from model_registry import ModelRegistry
+
+
+@pytest.fixture(scope="module")
+def registry():
+    return ModelRegistry(artifact_dir=None, linear_engine=False)
+
+
+@pytest.fixture(scope="module")
+def exported(registry, tmp_path_factory):
+    out_dir = str(tmp_path_factory.mktemp("artifacts"))
+    models = {key: registry.get(key) for key in LINEAR_MODEL_KEYS if registry.available(key)}
+    export_artifacts(registry.vectorizer(), models, out_dir)
+    return load_artifacts(out_dir)
+
+
+def test_transform_matches_vectorizer(registry, exported):
+    texts = synthetic_texts(registry.vectorizer(), 200) + ["", "zzunknownzz", "The CAT sat. The cat!"]
+    expected = registry.vectorizer().transform(texts)
+    actual = exported[0].transform(texts)
+    assert actual.has_sorted_indices
+    np.testing.assert_allclose(actual.toarray(), expected.toarray(), rtol=1e-6, atol=1e-7)
+
+
+def test_streaming_matches_transform(registry, exported):
+    from streaming_vectorizer import StreamingVectorizer
+
+    text = synthetic_texts(registry.vectorizer(), 1, max_words=3000)[0]
+    streamed = StreamingVectorizer(exported[0], chunk_size=997).transform_stream(text)
+    np.testing.assert_allclose(streamed.toarray(), exported[0].transform([text]).toarray(), rtol=1e-6)
+
+
+def test_models_match_estimators(registry, exported):
+    vectorizer, models = exported
+    texts = synthetic_texts(registry.vectorizer(), 200)
+    for key, model in models.items():
+        expected = registry.get(key).predict(registry.vectorizer().transform(texts))
+        assert (model.predict(vectorizer.transform(texts)) == expected).all()
+
+
+@pytest.mark.parametrize("settings", [
+    {"ngram_range": (1, 2)}, {"stop_words": "english"}, {"strip_accents": "unicode"},
+    {"binary": True}, {"analyzer": "char"}, {"tokenizer": str.split},
+], ids=["ngrams", "stop_words", "strip_accents", "binary", "analyzer", "tokenizer"])
+def test_unsupported_vectorizer_is_refused(tmp_path, settings):
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    vectorizer = TfidfVectorizer(**settings).fit(["the cat sat on the mat", "a dog ate the bone"])
+    with pytest.raises(ValueError):
+        export_artifacts(vectorizer, {}, str(tmp_path / "artifacts"))
+    assert not (tmp_path / "artifacts").exists()
@@ -0,0 +1,36 @@
+"""Uploaded article archives read in every supported JSON layout"""
+import io
+import json
+
+import pandas as pd
+import pytest
+
+from batch_classify import detect_format, read_articles
+
+ARTICLES = [{"headlines": f"Headline {i}", "content": f"Article number {i}"} for i in range(5)]
+
+
+def read(text, name):
+    source = io.BytesIO(text.encode("utf-8"))
+    source.name = name
+    return pd.concat(read_articles(source, chunk_size=2), ignore_index=True)
+
+
+@pytest.mark.parametrize("text", [
+    json.dumps(ARTICLES),
+    json.dumps({"articles": ARTICLES}),
+    "\n".join(json.dumps(article) for article in ARTICLES),
+])
+def test_json_layouts(text):
+    assert read(text, "articles.json").to_dict("records") == ARTICLES
+
+
+def test_detect_format():
+    assert detect_format("a.json") == "json"
+    assert detect_format("a.ndjson") == "jsonl"
+    assert detect_format("a.csv") == "csv"
+
+
+def test_json_object_without_articles_is_refused():
+    with pytest.raises(ValueError):
+        read(json.dumps({"items": ARTICLES}), "articles.json")
@@ -0,0 +1,47 @@
+"""FeedbackSink writes batches through locks and failures without losing its writer thread"""
+import sqlite3
+import threading
+import time
+
+from feedback_store import FeedbackSink, read_feedback
+
+
+def test_records_are_written(tmp_path):
+    path = str(tmp_path / "feedback.sqlite3")
+    sink = FeedbackSink(path, flush_interval=0.05)
+    assert sink.submit(message="great app", prediction="sports")
+    sink.close()
+    assert [row["message"] for row in read_feedback(path)] == ["great app"]
+    assert sink.stats()["written"] == 1
+
+
+def test_locked_database_is_retried(tmp_path):
+    path = str(tmp_path / "feedback.sqlite3")
+    sink = FeedbackSink(path, flush_interval=0.05, busy_timeout=0.05, backoff=0.1)
+    sink.submit(message="first")
+    time.sleep(0.3)
+
+    blocker = sqlite3.connect(path, check_same_thread=False)
+    blocker.execute("BEGIN EXCLUSIVE")
+    sink.submit(message="while locked")
+    timer = threading.Timer(0.2, blocker.rollback)
+    timer.start()
+    time.sleep(0.1)
+    sink.close()
+    timer.join()
+    blocker.close()
+
+    assert sorted(row["message"] for row in read_feedback(path)) == ["first", "while locked"]
+    assert sink.stats()["retries"] >= 1
+    assert sink.stats()["dropped"] == 0
+
+
+def test_unwritable_path_drops_batch_and_keeps_writer(tmp_path):
+    sink = FeedbackSink(str(tmp_path), flush_interval=0.05, retries=1, backoff=0.01)
+    sink.submit(message="lost")
+    time.sleep(0.3)
+    stats = sink.stats()
+    assert stats["dropped"] == 1 and stats["errors"] == 2
+    assert stats["writer_alive"] == 1
+    sink.close()
+    assert not sink.submit(message="after close")
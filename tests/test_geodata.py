@@ -0,0 +1,23 @@
+"""Every dashboard layer converts to WGS84 points inside South Africa"""
+import numpy as np
+import pytest
+
+from geodata import LAYERS, load_layer, mercator_to_degrees
+from spatial_index import SOUTH_AFRICA_BOUNDS
+
+
+@pytest.mark.parametrize("name", sorted(LAYERS))
+def test_layer_inside_south_africa(name):
+    layer = load_layer(name)
+    lon_min, lat_min, lon_max, lat_max = SOUTH_AFRICA_BOUNDS
+    assert len(layer)
+    assert ((layer.lon >= lon_min) & (layer.lon <= lon_max)).all(), f"{name}: lon {layer.lon.min()}..{layer.lon.max()}"
+    assert ((layer.lat >= lat_min) & (layer.lat <= lat_max)).all(), f"{name}: lat {layer.lat.min()}..{layer.lat.max()}"
+
+
+def test_mercator_to_degrees():
+    # Cape Town, projected to EPSG:3857 with the spherical forward formula
+    lon, lat = np.array([18.4241]), np.array([-33.9249])
+    x = np.radians(lon) * 6378137.0
+    y = np.log(np.tan(np.pi / 4 + np.radians(lat) / 2)) * 6378137.0
+    np.testing.assert_allclose(mercator_to_degrees(x, y), (lon, lat))
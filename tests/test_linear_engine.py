@@ -0,0 +1,96 @@
+"""Label and probability parity of linear_engine.LinearModel with the scikit-learn estimators"""
+import numpy as np
+import pytest
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.svm import LinearSVC
+
+from linear_engine import LINEAR_MODEL_KEYS, LinearModel, is_linear, synthetic_texts
+from model_registry import ModelRegistry
+
+
+@pytest.fixture(scope="module")
+def registry():
+    return ModelRegistry(artifact_dir=None, linear_engine=False)
+
+
+@pytest.fixture(scope="module")
+def vect_text(registry):
+    return registry.vectorizer().transform(synthetic_texts(registry.vectorizer(), 300))
+
+
+def assert_parity(estimator, vect_text):
+    linear = LinearModel.from_estimator(estimator)
+    assert (linear.predict(vect_text) == estimator.predict(vect_text)).all()
+    if linear.probability:
+        np.testing.assert_allclose(linear.predict_proba(vect_text), estimator.predict_proba(vect_text),
+                                   rtol=1e-7, atol=1e-9)
+
+
+@pytest.mark.parametrize("key", LINEAR_MODEL_KEYS)
+def test_pickled_models(registry, vect_text, key):
+    if not registry.available(key):
+        pytest.skip(f"{key} not present")
+    assert_parity(registry.get(key), vect_text)
+
+
+def labels(registry, vect_text, classes=None):
+    """Training labels: the logistic model's predictions, optionally restricted to `classes`"""
+    predicted = registry.get("lr_model").predict(vect_text)
+    if classes is None:
+        return predicted
+    return np.where(np.isin(predicted, classes), predicted, classes[0])
+
+
+@pytest.mark.parametrize("estimator", [
+    LogisticRegression(),
+    LogisticRegression(multi_class="multinomial"),
+    LogisticRegression(solver="liblinear"),
+    SGDClassifier(loss="log_loss", random_state=0),
+], ids=["ovr", "multinomial", "liblinear", "sgd"])
+def test_binary_models(registry, vect_text, estimator):
+    y = labels(registry, vect_text, classes=["business", "sports"])
+    y[:10] = ["business", "sports"] * 5
+    assert_parity(estimator.fit(vect_text, y), vect_text)
+
+
+@pytest.mark.parametrize("estimator", [
+    LogisticRegression(solver="liblinear"),
+    LogisticRegression(multi_class="ovr"),
+    SGDClassifier(loss="log_loss", random_state=0),
+], ids=["liblinear", "ovr", "sgd"])
+def test_one_vs_rest_models(registry, vect_text, estimator):
+    assert_parity(estimator.fit(vect_text, labels(registry, vect_text)), vect_text)
+
+
+def test_online_model(registry, vect_text):
+    from online_learning import from_logistic
+
+    model = from_logistic(registry.get("lr_model"), registry.vectorizer())
+    model.partial_fit(vect_text[:50], labels(registry, vect_text)[::-1][:50])
+    assert_parity(model, vect_text)
+
+
+MARGIN_ESTIMATORS = [LinearSVC(), SGDClassifier(loss="hinge", random_state=0)]
+
+
+@pytest.mark.parametrize("estimator", MARGIN_ESTIMATORS, ids=["linear_svc", "sgd_hinge"])
+def test_margin_models(registry, vect_text, estimator):
+    estimator.fit(vect_text, labels(registry, vect_text))
+    assert is_linear(estimator)
+    assert_parity(estimator, vect_text)
+    np.testing.assert_allclose(LinearModel.from_estimator(estimator).decision_function(vect_text),
+                               estimator.decision_function(vect_text), rtol=1e-7, atol=1e-9)
+
+
+@pytest.mark.parametrize("estimator", MARGIN_ESTIMATORS, ids=["linear_svc", "sgd_hinge"])
+def test_binary_margin_models(registry, vect_text, estimator):
+    y = labels(registry, vect_text, classes=["business", "sports"])
+    y[:10] = ["business", "sports"] * 5
+    assert_parity(estimator.fit(vect_text, y), vect_text)
+
+
+def test_margin_models_have_no_probabilities(registry, vect_text):
+    linear = LinearModel.from_estimator(LinearSVC().fit(vect_text, labels(registry, vect_text)))
+    assert not linear.probability
+    with pytest.raises(AttributeError):
+        linear.predict_proba(vect_text)
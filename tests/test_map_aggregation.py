@@ -0,0 +1,19 @@
+"""Points binned into a bounded number of map markers"""
+import numpy as np
+import pytest
+
+from map_aggregation import aggregate
+
+
+def test_aggregate_caps_markers():
+    rng = np.random.default_rng(0)
+    lon, lat = rng.uniform(16.3, 33.0, 10000), rng.uniform(-35.0, -22.1, 10000)
+    markers = aggregate(lon, lat, zoom=5, max_markers=100)
+    assert len(markers.lon) <= 100
+    assert markers.count.sum() == 10000
+
+
+@pytest.mark.parametrize("max_markers", [0, -1])
+def test_aggregate_rejects_fewer_than_one_marker(max_markers):
+    with pytest.raises(ValueError):
+        aggregate([18.4, 28.0], [-33.9, -26.2], zoom=5, max_markers=max_markers)
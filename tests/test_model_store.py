@@ -0,0 +1,86 @@
+"""Published model versions carry the compact export of their linear models"""
+import os
+
+import joblib
+import numpy as np
+import pytest
+
+from config import paths
+from linear_engine import synthetic_texts
+from model_registry import ModelRegistry
+from model_store import ModelStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    if not os.path.exists(paths["tfidf_vectorizer"]):
+        pytest.skip("tfidf_vectorizer not present")
+    return ModelStore(root=str(tmp_path / "model_versions"))
+
+
+def formats(registry):
+    registry.preload()
+    return {key: info["format"] for key, info in registry.stats().items()}
+
+
+def test_publish_exports_artifacts(store):
+    version = store.publish({}, activate=True)
+    served = formats(store.load(version))
+    assert served["tfidf_vectorizer"] == "compact"
+    assert all(served[key] == "compact" for key in ("lr_model", "nb_model", "svm_model") if key in served)
+
+
+def test_snapshot_reuses_previous_export(store, tmp_path):
+    from online_learning import from_logistic
+
+    first = store.publish({}, activate=True)
+    base = ModelRegistry(artifact_dir=None, linear_engine=False)
+    model = from_logistic(base.get("lr_model"), base.vectorizer())
+    joblib.dump(model, tmp_path / "online_sgd_model.pkl")
+    second = store.publish({"online_model": str(tmp_path / "online_sgd_model.pkl")})
+
+    def inode(version):
+        return os.stat(os.path.join(store.root, version, "artifacts", "idf.npy")).st_ino
+
+    assert inode(first) == inode(second)
+    registry = store.load(second)
+    assert formats(registry)["online_model"] == "compact"
+    texts = synthetic_texts(base.vectorizer(), 100)
+    np.testing.assert_array_equal(registry.get("online_model").predict(registry.vectorizer().transform(texts)),
+                                  model.predict(base.vectorizer().transform(texts)))
+
+
+def test_versions_skip_staging_directories(store):
+    os.makedirs(os.path.join(store.root, ".v0002.tmp"))
+    with open(os.path.join(store.root, ".v0002.tmp", "manifest.json"), "w") as f:
+        f.write("{}")
+    assert store.versions() == []
+    assert store.publish({}) == "v0001"
+    assert store.versions() == ["v0001"]
+
+
+def test_publish_keeps_only_recent_versions(store):
+    store.retention = 2
+    first = store.publish({}, activate=True)
+    for _ in range(3):
+        store.publish({})
+    # The active version survives however old it is
+    assert store.versions() == [first, "v0003", "v0004"]
+    store.activate("v0004")
+    assert store.prune() == [first]
+    assert not any(name.startswith(".") for name in os.listdir(store.root))
+
+
+def test_new_version_reuses_loaded_models(store, tmp_path):
+    store.publish({}, activate=True)
+    store.check()
+    served = store.registry()
+    served.preload()
+    base = ModelRegistry(artifact_dir=None, linear_engine=False)
+    joblib.dump(base.get("lr_model"), tmp_path / "lr_classifier_model.pkl")
+    store.publish({"lr_model": str(tmp_path / "lr_classifier_model.pkl")}, activate=True)
+    store.check()
+    registry = store.registry()
+    assert registry.get("nb_model") is served.get("nb_model")
+    assert registry.get("tfidf_vectorizer") is served.get("tfidf_vectorizer")
+    assert registry.get("lr_model") is not served.get("lr_model")
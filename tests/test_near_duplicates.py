@@ -0,0 +1,30 @@
+"""Labels stored for near-duplicate articles"""
+from near_duplicates import NearDuplicateIndex
+
+ARTICLE = ("The minister announced new funding for schools across the province on Monday, "
+           "officials said in a statement released after the budget debate. ") * 3
+
+
+def test_near_duplicate_is_found():
+    index = NearDuplicateIndex()
+    index.add(ARTICLE, "svm_model@a", "education")
+    match = index.lookup(ARTICLE + " Updated.", "svm_model@a")
+    assert match["label"] == "education"
+    assert index.lookup(ARTICLE, "lr_model@b") is None
+
+
+def test_near_duplicate_keeps_the_indexed_label():
+    index = NearDuplicateIndex()
+    index.add(ARTICLE, "svm_model@a", "business")
+    index.add(ARTICLE + " Updated.", "svm_model@a", "education")
+    assert len(index) == 1
+    assert index.lookup(ARTICLE, "svm_model@a")["label"] == "business"
+
+
+def test_other_models_share_the_entry():
+    index = NearDuplicateIndex()
+    index.add(ARTICLE, "svm_model@a", "education")
+    index.add(ARTICLE, "lr_model@b", "business")
+    assert len(index) == 1
+    assert index.lookup(ARTICLE, "svm_model@a")["label"] == "education"
+    assert index.lookup(ARTICLE, "lr_model@b")["label"] == "business"
@@ -0,0 +1,13 @@
+"""The app imports and renders its first page under AppTest within benchmark.STARTUP_BUDGET"""
+import pytest
+
+pytest.importorskip("streamlit.testing.v1")
+
+from benchmark import STARTUP_BUDGET, check_startup, startup
+
+
+def test_startup_within_budget():
+    # A fresh interpreter, as a new container would start; see benchmark._STARTUP
+    result = startup(repeat=1)
+    assert check_startup(result, STARTUP_BUDGET) == [], (
+        f"import {result['import']:.2f}s + first render {result['first_render']:.2f}s")
@@ -1,23 +1,215 @@
+"""The News Classifier Streamlit app: `streamlit run base_app.py` (or this file).
+
+Only light modules are imported at the top. pandas, plotly, scipy and the
+scikit-learn pickles are imported or loaded inside the pages that use them,
+so a new worker can render the Home page without paying for them;
+`python benchmark.py --startup-only` checks this against a time budget.
+"""
 import streamlit as st
-import os
-from PIL import Image
-from sklearn.externals import joblib
-
-# Define paths to models and other resources
-base_dir = os.path.dirname(__file__)
-
-paths = {
-    "svm_model": os.path.join(base_dir, 'svm_classifier_model.pkl'),
-    "tfidf_vectorizer": os.path.join(base_dir, 'tfidf_vectorizer.pkl'),
-    "lr_model": os.path.join(base_dir, 'lr_classifier_model.pkl'),
-    "nb_model": os.path.join(base_dir, 'nb_classifier_model.pkl'),
-    "rf_model": os.path.join(base_dir, 'rf_classifier_model.pkl'),
-    "announcement_image": os.path.join(base_dir, 'announcement_image.png'),
-    "class_dist": os.path.join(base_dir, 'class_dist.png'),
-    "balanced_class_dist": os.path.join(base_dir, 'balanced_class_dist.png'),
-    "new_word_cloud": os.path.join(base_dir, 'new_word_cloud.png'),
-    "logo_image": os.path.join(base_dir, 'logo_image.png')
-}
+
+from assets import get_asset_cache
+from config import models
+from feedback_store import get_feedback_sink
+from metrics import get_metrics
+from model_registry import get_registry
+from prediction_cache import get_prediction_cache
+
+COMPARE_ALL = "Compare all"
+
+def show_image(images, key, **kwargs):
+    """Render a cached display image, timing the lookup and the render"""
+    with get_metrics().timer("image"):
+        st.image(images.get(key), **kwargs)
+
+def classify_text(model, vectorizer, text):
+    """Vectorise and predict one article, timing each stage separately"""
+    metrics = get_metrics()
+    with metrics.timer("transform"):
+        vect_text = vectorizer.transform([text])
+    with metrics.timer("predict"):
+        return str(model.predict(vect_text)[0])
+
+def batch_prediction(selected_model, vectorizer):
+    """Classify an uploaded CSV/JSON/JSONL file of articles in vectorised chunks"""
+    from batch_classify import classify_to_csv, detect_format
+
+    uploaded = st.file_uploader("Upload articles (CSV, JSON or JSON lines)", type=["csv", "jsonl", "json"])
+    chunk_size = st.number_input("Articles per chunk", min_value=1, max_value=100000, value=1000, step=500)
+    text_column = st.text_input("Text column (leave blank to detect)", "")
+
+    if uploaded is not None and st.button("Classify file"):
+        progress = st.empty()
+        try:
+            with get_metrics().timer("batch_file"):
+                csv_bytes, n_articles, seconds = classify_to_csv(
+                    uploaded, selected_model, vectorizer,
+                    fmt=detect_format(uploaded.name),
+                    chunk_size=int(chunk_size),
+                    text_column=text_column or None,
+                    on_chunk=lambda n: progress.text(f"Classified {n} articles..."),
+                )
+        except Exception as e:
+            st.error(f"Error: {e}")
+            return
+
+        rate = n_articles / seconds if seconds else float("inf")
+        progress.success(f"Classified {n_articles} articles in {seconds:.2f}s ({rate:,.0f} articles/s)")
+        st.download_button("Download predictions", csv_bytes,
+                           file_name="predictions.csv", mime="text/csv")
+
+def compare_prediction(registry):
+    """Run every model on the same TF-IDF row and show an ensemble vote"""
+    from ensemble import compare_models
+
+    news_text = st.text_area("Enter news text for classification", "")
+    if st.button("Classify with all models"):
+        try:
+            with get_metrics().timer("compare"):
+                results, ensemble, skipped = compare_models(registry, news_text)
+        except Exception as e:
+            st.error(f"Error: {e}")
+            return
+
+        st.success(f"Majority vote: {ensemble['majority']} | "
+                   f"Probability-weighted: {ensemble['weighted']}")
+        st.table([
+            {
+                "Model": r["model"],
+                "Prediction": r["label"],
+                "Confidence": f"{max(r['proba'].values()):.2f}" if r["proba"] else "n/a",
+                "Time (ms)": f"{r['seconds'] * 1000:.1f}",
+            }
+            for r in results
+        ])
+        if skipped:
+            st.warning(f"Skipped (model file not found): {', '.join(skipped)}")
+
+def cascade_prediction(registry):
+    """Answer with the cheapest model that is confident enough, and show the top-k categories"""
+    from cascade import cascade_predict
+
+    threshold = st.sidebar.slider("Confidence threshold", 0.0, 1.0, 0.8, 0.05)
+    k = st.sidebar.slider("Top categories to show", 1, 5, 3)
+    news_text = st.text_area("Enter news text for classification", "")
+    if st.button("Classify"):
+        try:
+            with get_metrics().timer("cascade"):
+                result = cascade_predict(registry, news_text, threshold=threshold, k=k)
+        except Exception as e:
+            st.error(f"Error: {e}")
+            return
+
+        st.success(f"The article is categorized as: {result['label']} "
+                   f"(answered by {result['stage']}, stage {result['stage_index']}, "
+                   f"score {result['confidence']:.2f})")
+        st.table([{"Category": label, "Score": f"{score:.3f}"} for label, score in result["top_k"]])
+        with st.expander("Stages tried"):
+            st.table([
+                {"Stage": a["stage"], "Prediction": a["label"], "Score": f"{a['confidence']:.3f}",
+                 "Calibrated": "yes" if a["calibrated"] else "no", "Time (ms)": f"{a['seconds'] * 1000:.2f}"}
+                for a in result["attempts"]
+            ])
+            if not all(a["calibrated"] for a in result["attempts"]):
+                st.caption("Uncalibrated stages score on different scales; fit per-stage temperatures with "
+                           "`python cascade.py calibrate <labelled.csv>`.")
+
+def eda_charts(stats):
+    """Interactive charts drawn from the precomputed corpus aggregates in eda_stats.py"""
+    import plotly.express as px
+
+    from eda_stats import LENGTH_BINS
+
+    categories = sorted(stats["counts"].category)
+    selected = st.multiselect("Categories", categories, default=categories) or categories
+
+    st.subheader("Class Distribution")
+    counts = stats["counts"][stats["counts"].category.isin(selected)]
+    if st.toggle("Show as share of articles"):
+        counts = counts.assign(articles=counts.articles / counts.articles.sum())
+    st.plotly_chart(px.bar(counts, x="category", y="articles", color="category"), use_container_width=True)
+
+    st.subheader("Article Length")
+    bin_labels = {lo: f"{lo}-{hi - 1}" for lo, hi in zip(LENGTH_BINS, LENGTH_BINS[1:])}
+    bin_labels[LENGTH_BINS[-1]] = f"{LENGTH_BINS[-1]}+"
+    lengths = stats["lengths"][stats["lengths"].category.isin(selected)]
+    lengths = lengths.assign(words=lengths.words.map(bin_labels))
+    st.plotly_chart(px.bar(lengths, x="words", y="articles", color="category", barmode="group",
+                           labels={"words": "Words per article"}), use_container_width=True)
+
+    st.subheader("Most Used Words by Category")
+    category = st.selectbox("Category", selected)
+    n_terms = st.slider("Number of words", 5, 50, 20)
+    terms = stats["terms"][stats["terms"].category == category].nlargest(n_terms, "occurrences")
+    st.plotly_chart(px.bar(terms.iloc[::-1], x="occurrences", y="term", orientation="h"), use_container_width=True)
+
+def classify_or_reuse(model, vectorizer, text, model_key):
+    """Reuse the label of an earlier near-duplicate article, or classify and index this one"""
+    from near_duplicates import get_near_duplicate_index
+
+    duplicates = get_near_duplicate_index()
+    signature = duplicates.hasher.signature(text)
+    match = duplicates.lookup(text, model_key, signature)
+    if match is not None:
+        st.caption(f"Near-duplicate of an earlier article (similarity {match['similarity']:.2f}); "
+                   f"its category was reused.")
+        return match["label"]
+    prediction = classify_text(model, vectorizer, text)
+    duplicates.add(text, model_key, prediction, signature)
+    return prediction
+
+def explain_prediction(model, vectorizer, text, label, model_key, vect_text=None):
+    """Explanation of the label shown for `text`, cached next to the prediction"""
+    from explain import explain
+
+    cache = get_prediction_cache()
+    explain_key = f"{model_key}:explanation"
+    explanation = cache.get(text, explain_key)
+    if explanation is None:
+        if vect_text is None:
+            vect_text = vectorizer.transform([text])
+        with get_metrics().timer("explain"):
+            explanation = explain(model, vectorizer, vect_text, label=label)
+        cache.put(text, explain_key, explanation or {})
+    return explanation or None
+
+def show_explanation(explanation, k=10):
+    """Terms that pushed the article towards its label and towards the runner-up"""
+    if explanation is None:
+        st.caption("Explanations are available for the linear models (Naive Bayes, Logistic Regression, SVM).")
+        return
+    label, versus = explanation["label"], explanation["versus"]
+    st.markdown(f"**Why {label} rather than {versus}**")
+    if explanation["predicted"] != label:
+        st.caption(f"{label} was reused from an earlier near-duplicate article; on this text alone the model "
+                   f"scores {explanation['predicted']} highest, so the terms below may not favour {label}.")
+    col1, col2 = st.columns(2)
+    col1.caption(f"Terms pointing to {label}")
+    col1.table([{"Term": term, "Contribution": f"{value:+.3f}"} for term, value, _ in explanation["terms_for"][:k]])
+    col2.caption(f"Terms pointing to {versus}")
+    col2.table([{"Term": term, "Contribution": f"{value:+.3f}"} for term, value, _ in explanation["terms_against"][:k]])
+
+def admin_page():
+    """Per-stage timings, cache hit rates and memory for this process"""
+    metrics = get_metrics()
+    histograms, counters, gauges = metrics.snapshot()
+    st.info("Metrics for this process")
+    st.table([
+        {"Stage": stage, "Count": h["count"], "Mean (ms)": f"{h['sum'] / h['count'] * 1000:.2f}",
+         "p50 (ms)": f"{h['p50'] * 1000:g}", "p95 (ms)": f"{h['p95'] * 1000:g}", "p99 (ms)": f"{h['p99'] * 1000:g}"}
+        for stage, h in sorted(histograms.items()) if h["count"]
+    ])
+    st.caption("Percentiles are the upper bound of the histogram bucket they fall in.")
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Prediction cache hit rate", f"{gauges.get('prediction_cache_hit_rate', 0):.0%}")
+    col2.metric("Image cache hit rate", f"{gauges.get('asset_cache_hit_rate', 0):.0%}")
+    col3.metric("Near-duplicate index", f"{gauges.get('near_duplicates_size', 0):.0f} articles",
+                f"{gauges.get('near_duplicates_hit_rate', 0):.0%} reused", delta_color="off")
+    col4.metric("Resident memory", f"{gauges['process_resident_bytes'] / 1e6:.0f} MB")
+    st.write({"counters": counters, "gauges": gauges})
+    if st.button("Write Prometheus dump now"):
+        st.success(f"Wrote {metrics.write_textfile()}")
+    with st.expander("Prometheus text"):
+        st.code(metrics.prometheus_text(), language="text")
 
 def main():
     """Streamlit News Classification App"""
@@ -34,8 +226,14 @@ def main():
         """, unsafe_allow_html=True)
 
     pages = ["Home", "Information", "EDA", "Prediction", "Feedback", "About Us"]
+    # Not linked anywhere: open the app with ?admin=1 to see it
+    if st.query_params.get("admin") == "1":
+        pages.append("Admin")
     choice = st.sidebar.selectbox("Navigate to", pages)
 
+    # Images are resized and encoded once per process, not on every rerun
+    images = get_asset_cache()
+
     if choice == "Home":
         st.info("Welcome to the News Classifier App!")
         st.markdown(
@@ -45,7 +243,7 @@ def main():
             Use the sidebar to explore different sections including Information, EDA, Prediction, Feedback, and About Us.
             """
         )
-        st.image(Image.open(paths["announcement_image"]), caption='Welcome to the News Classifier App!')
+        show_image(images, "announcement_image", caption='Welcome to the News Classifier App!')
 
     elif choice == "Information":
         st.info("General Information")
@@ -84,45 +282,109 @@ def main():
             """
         )
         
-        st.subheader("Imbalanced Class Distribution")
-        st.image(Image.open(paths["class_dist"]), caption='Distribution of Articles by Category')
-        
-        if st.button("View Balanced Data"):
-            st.image(Image.open(paths["balanced_class_dist"]), caption='Balanced Distribution of Articles by Category')
+        from eda_stats import load_stats
 
-        st.subheader("Word Cloud by Category")
-        st.image(Image.open(paths["new_word_cloud"]), caption='Most Used Words in Each Category')
+        stats = load_stats()
+        if stats is not None:
+            eda_charts(stats)
+            if st.button("View Balanced Data"):
+                show_image(images, "balanced_class_dist", caption='Balanced Distribution of Articles by Category')
+        else:
+            # Static images until the aggregates are built with `python eda_stats.py <corpus>`
+            st.subheader("Imbalanced Class Distribution")
+            show_image(images, "class_dist", caption='Distribution of Articles by Category')
+
+            if st.button("View Balanced Data"):
+                show_image(images, "balanced_class_dist", caption='Balanced Distribution of Articles by Category')
+
+            st.subheader("Word Cloud by Category")
+            show_image(images, "new_word_cloud", caption='Most Used Words in Each Category')
 
-        ... (other sections omitted for brevity)
+        # ... (other sections omitted for brevity)
 
     elif choice == "Prediction":
         st.info("Make Predictions")
-        model_choice = st.sidebar.radio("Select Model", list(models.keys()))
-
-        # Load selected model
-        if model_choice == "Logistic Regression":
-            selected_model = joblib.load(paths["lr_model"])
-        elif model_choice == "Multinomial Naive Bayes":
-            selected_model = joblib.load(paths["nb_model"])
-        elif model_choice == "Random Forest":
-            selected_model = joblib.load(paths["rf_model"])
-        elif model_choice == "Support Vector Machine (SVM)":
-            selected_model = joblib.load(paths["svm_model"])
-        else:
+        # Models are loaded once per process and shared across sessions
+        registry = get_registry()
+        # The online model is offered once a published version includes it
+        model_choice = st.sidebar.radio("Select Model", registry.model_names() + [COMPARE_ALL])
+        if model_choice == COMPARE_ALL:
+            compare_prediction(registry)
+            return
+
+        try:
+            selected_model = registry.get(models[model_choice])
+            vectorizer = registry.vectorizer()
+        except FileNotFoundError:
             st.error("Model not found.")
+            return
 
-        # Load TF-IDF vectorizer
-        vectorizer = joblib.load(paths["tfidf_vectorizer"])
+        with st.sidebar.expander("Loaded models"):
+            st.write(f"Model version: **{registry.version}**")
+            for key, info in registry.stats().items():
+                st.write(f"**{key}**: {info['load_seconds'] * 1000:.0f} ms, "
+                         f"{info['memory_bytes'] / 1e6:.1f} MB in memory")
+
+        mode = st.radio("Mode", ["Single article", "Batch file", "Cascade"], horizontal=True)
+
+        if mode == "Batch file":
+            batch_prediction(selected_model, vectorizer)
+            return
+        if mode == "Cascade":
+            cascade_prediction(registry)
+            return
+
+        cache = get_prediction_cache()
+        explain_on = st.sidebar.checkbox("Explain predictions", value=True)
 
         news_text = st.text_area("Enter news text for classification", "")
+        long_article = st.file_uploader("...or upload a long article (.txt)", type=["txt"])
         if st.button("Classify"):
             try:
-                vect_text = vectorizer.transform([news_text])
-                prediction = selected_model.predict(vect_text)[0]
+                if long_article is not None:
+                    from streaming_vectorizer import StreamingVectorizer
+
+                    # Streamed in chunks so memory stays bounded by the vocabulary size
+                    with get_metrics().timer("transform_stream"):
+                        vect_text = StreamingVectorizer(vectorizer).transform_stream(long_article)
+                    with get_metrics().timer("predict"):
+                        prediction = selected_model.predict(vect_text)[0]
+                else:
+                    # Keyed on the model's own files, so a hot-swapped model never serves stale labels
+                    # while versions that leave this model unchanged keep its cached predictions
+                    model_key = f"{models[model_choice]}@{registry.fingerprint(models[model_choice])}"
+                    prediction = cache.get(news_text, model_key)
+                    if prediction is None:
+                        prediction = classify_or_reuse(selected_model, vectorizer, news_text, model_key)
+                        cache.put(news_text, model_key, prediction)
+                get_metrics().inc("classify")
                 st.success(f"The article is categorized as: {prediction}")
+                st.session_state.last_prediction = {
+                    "article_text": news_text if long_article is None else long_article.name,
+                    "prediction": str(prediction),
+                    "model": model_choice,
+                    "model_version": registry.version,
+                    "uploaded": long_article is not None,
+                }
+                st.session_state.categories = [str(c) for c in selected_model.classes_]
+
+                if explain_on and long_article is None:
+                    show_explanation(explain_prediction(selected_model, vectorizer, news_text, prediction,
+                                                        model_key))
+                elif explain_on:
+                    from explain import explain
+
+                    with get_metrics().timer("explain"):
+                        show_explanation(explain(selected_model, vectorizer, vect_text, label=prediction))
             except Exception as e:
                 st.error(f"Error: {e}")
 
+        cache_stats = cache.stats()
+        st.sidebar.caption(
+            f"Prediction cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+            f"({cache_stats['hit_rate']:.0%}), {cache_stats['size']} entries"
+        )
+
     elif choice == "Feedback":
         st.info("Feedback")
         st.markdown(
@@ -143,12 +405,30 @@ def main():
             """
         )
         feedback = st.text_area("Your Feedback", "")
+        last_prediction = st.session_state.get("last_prediction")
+        include_prediction = last_prediction is not None and st.checkbox(
+            f"Attach my last classification ({last_prediction['model']}: "
+            f"{last_prediction['prediction']}) for accuracy reports"
+        )
+        correction = None
+        if include_prediction and not last_prediction["uploaded"]:
+            # Corrected labels are picked up by online_learning.py to update the online model
+            others = [c for c in st.session_state.get("categories", []) if c != last_prediction["prediction"]]
+            correction = st.selectbox("If the category was wrong, pick the right one", ["It was right"] + others)
+            if correction == "It was right":
+                correction = None
         if st.button("Submit Feedback"):
+            # Queued only; a background thread writes it to disk in batches
+            get_metrics().inc("feedback")
+            if correction:
+                get_feedback_sink().submit(kind="correction", message=feedback, label=correction, **last_prediction)
+            else:
+                get_feedback_sink().submit(message=feedback, **(last_prediction if include_prediction else {}))
             st.success("Thank you for your feedback! We will use it to improve the application.")
 
     elif choice == "About Us":
         st.info("About Us")
-        st.image(Image.open(paths["logo_image"]), width=300)
+        show_image(images, "logo_image", width=300)
         st.markdown(
             """
             ## About Us
@@ -160,5 +440,14 @@ def main():
             """
         )
 
+    elif choice == "Admin":
+        admin_page()
+
+def run():
+    """Render the app once; Streamlit calls this on every rerun"""
+    get_metrics().start_writer()
+    with get_metrics().timer("rerun"):
+        main()
+
 if __name__ == '__main__':
-    main()
+    run()